@@ -0,0 +1,85 @@
+from classes.MatchEngine import MatchEngine
+
+class AdminUnitResolver:
+    """
+    Resolves department strings to their admin unit, admin unit code and John Jay center using lookups
+    prepared once from the org units and centers, memoising the result of every distinct department string.
+    """
+    def __init__(self, units, centers, **engine_options):
+        """
+        Parameters:
+        - units: Maps the name of every admin unit to its code.
+        - centers: Maps the name of every center to a tuple with the name and code of the admin unit it belongs to.
+        - engine_options: Options passed to the MatchEngine (scorer, cutoff, compatibility_mode).
+        """
+        self.units = {str(name): code for name, code in units.items()}
+        self.centers = {str(name): center for name, center in centers.items()}
+        self.unit_names = list(self.units.keys())
+        self.center_names = list(self.centers.keys())
+        self.unit_engine = MatchEngine(self.unit_names, **engine_options)
+        self.center_engine = MatchEngine(self.center_names, **engine_options)
+        self.cache = dict()
+
+    @classmethod
+    def from_file_contents(cls, dept_file_content, centers_file_content, **engine_options):
+        # Builds the resolver from the files of valid Departments ('Name', 'Primary Code') and Centers ('Name', 'Admin Unit', 'Admin Unit Code')
+        return cls(
+            { dept['Name'].split(" - ")[1]: dept['Primary Code'] for index, dept in dept_file_content.iterrows() },
+            { center['Name']: (center['Admin Unit'], center['Admin Unit Code']) for index, center in centers_file_content.iterrows() },
+            **engine_options
+        )
+
+    def match_unit(self, department):
+        """
+        Returns:
+        - The name of the admin unit that matches the department exactly or most closely, or None.
+        """
+        return self.unit_engine.match(department)
+
+    def match_center(self, department):
+        """
+        Returns:
+        - The name of the center that matches the department exactly or most closely, or None.
+        """
+        return self.center_engine.match(department)
+
+    def match_all(self, departments):
+        # Matches a whole column of departments against the admin units and centers in one batch each
+        self.unit_engine.match_all(departments)
+        self.center_engine.match_all(departments)
+
+    def resolve(self, department):
+        """
+        Resolves a department to an admin unit first and to a center when no admin unit matches.
+
+        Returns:
+        - A tuple with the admin unit, the admin unit code, the center and the reason the department could not be resolved.
+          The first three are None when the department could not be resolved, the last one is None when it could.
+        """
+        if not department:
+            return None, None, None, "Grant does not have a primary department in the database."
+        if department not in self.cache:
+            try:
+                self.cache[department] = self._resolve(department)
+            except Exception as e:
+                self.cache[department] = (None, None, None, str(e))
+        return self.cache[department]
+
+    def _resolve(self, department):
+        unit_name = self.match_unit(department)
+        if unit_name:
+            return unit_name, self.units[unit_name], None, None
+        center_name = self.match_center(department)
+        if center_name:
+            unit_name, unit_code = self.centers[center_name]
+            return unit_name, unit_code, center_name, None
+        return None, None, None, f"Failed to determine a valid department for {department}"
+
+    def resolve_all(self, departments):
+        """
+        Resolves a list of departments, matching every distinct department once.
+
+        Returns:
+        - A list of (unit, code, center, error) tuples aligned with the departments.
+        """
+        return [self.resolve(department) for department in departments]
@@ -1,10 +1,11 @@
 import openpyxl
 import os
+from classes.CommentStore import CommentStore
 
 class CommentManager:
     def __init__(self, read_file_path):
         if os.path.exists(read_file_path):
-            existing_comments = dict()
+            existing_comments = dict()  # Maps each sheet name to its CommentStore
             # Load the workbook
             workbook = openpyxl.load_workbook(read_file_path)
             # Commented for debugging purposes -----
@@ -18,16 +19,31 @@ class CommentManager:
         else:
             raise Exception("The comment manager was provided an invalid file path.")
         
+    def _get_store(self, sheet):
+        if sheet not in self.sheets:
+            raise Exception(f"The sheet '{sheet}' does not exist in the workbook")
+        if sheet not in self.comment_cache:
+            self.comment_cache[sheet] = CommentStore()
+        return self.comment_cache[sheet]
+
     # Add cell comments to the object's comment cache
     def append_comment(self, sheet, row, col, comment):
-        if sheet in self.sheets:
-            if sheet not in self.comment_cache:
-                self.comment_cache[sheet] = { f"{row + 1}:{col + 1}": comment } # Plus 1 accounts for rows and columns being 1-based index
-            else:
-                self.comment_cache[sheet].update({ f"{row + 1}:{col + 1}": comment })   # Plus 1 accounts for rows and columns being 1-based index
-        else:
-            raise Exception(f"The sheet '{sheet}' does not exist in the workbook")
-        
+        self._get_store(sheet).append(row + 1, col + 1, comment)   # Plus 1 accounts for rows and columns being 1-based index
+
+    # Add the comments of a whole sheet at once from parallel lists of rows, columns and messages
+    def append_comments(self, sheet, rows, cols, comments):
+        self._get_store(sheet).extend(
+            (int(row) + 1 for row in rows),   # Plus 1 accounts for rows and columns being 1-based index
+            (int(col) + 1 for col in cols),
+            comments
+        )
+
+    # Returns the (row, col, message) comments of a sheet sorted by cell, using 1-based rows and columns
+    def get_comments(self, sheet):
+        if sheet not in self.comment_cache:
+            return []
+        return self.comment_cache[sheet].entries()
+
     # Create the comments in the excel file that are stored in the object's cache
     def create_comments(self, write_file_path):
         # Load the workbook
@@ -35,10 +51,9 @@ class CommentManager:
         for sheet_name in self.comment_cache:
             if sheet_name in workbook.sheetnames:
                 sheet_content = workbook[sheet_name]
-                for cell_position in self.comment_cache[sheet_name]:
-                    row, col = cell_position.split(':')
-                    cell = sheet_content.cell(int(row), int(col))
-                    comment = openpyxl.comments.Comment(self.comment_cache[sheet_name][cell_position], "Developer")
+                for row, col, message in self.comment_cache[sheet_name].entries():
+                    cell = sheet_content.cell(row, col)
+                    comment = openpyxl.comments.Comment(message, "Developer")
                     cell.comment = comment
                     comment.height = 150 # Height in pixels
                     comment.width = 300 # Width in pixels
@@ -0,0 +1,70 @@
+import threading
+from array import array
+import numpy as np
+
+class CommentStore:
+    """
+    Holds the comments of a single sheet in parallel integer arrays (row, column, message id) and a table of
+    distinct messages, so repeated messages are only stored once no matter how many cells they are added to.
+    """
+    def __init__(self):
+        self.rows = array('l')
+        self.cols = array('l')
+        self.message_ids = array('l')
+        self.messages = []
+        self.message_index = dict()
+        self.lock = threading.Lock()
+
+    def _intern(self, message):
+        message = str(message)
+        message_id = self.message_index.get(message)
+        if message_id is None:
+            message_id = len(self.messages)
+            self.messages.append(message)
+            self.message_index[message] = message_id
+        return message_id
+
+    def append(self, row, col, message):
+        self.extend([row], [col], [message])
+
+    def extend(self, rows, cols, messages):
+        """
+        Adds comments from parallel lists of rows, columns and messages, each converted to a string.
+
+        Parameters:
+        - rows: The 1-based row of every comment.
+        - cols: The 1-based column of every comment.
+        - messages: The text of every comment.
+        """
+        with self.lock:
+            for row, col, message in zip(rows, cols, messages):
+                self.rows.append(int(row))
+                self.cols.append(int(col))
+                self.message_ids.append(self._intern(message))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def entries(self):
+        """
+        Returns:
+        - A list of (row, column, message) tuples sorted by row and column. When a cell was commented
+          more than once only the last comment is kept, the same way a dictionary keyed by cell would.
+        """
+        with self.lock:
+            if not self.rows:
+                return []
+            rows = np.asarray(self.rows, dtype=np.int64)
+            cols = np.asarray(self.cols, dtype=np.int64)
+            message_ids = np.asarray(self.message_ids, dtype=np.int64)
+            messages = list(self.messages)
+
+        # Sorted by row, column and insertion order, the last entry of every cell is the one that is kept
+        order = np.lexsort((np.arange(len(rows)), cols, rows))
+        rows, cols, message_ids = rows[order], cols[order], message_ids[order]
+        is_last = np.ones(len(rows), dtype=bool)
+        is_last[:-1] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        return [
+            (int(row), int(col), messages[message_id])
+            for row, col, message_id in zip(rows[is_last], cols[is_last], message_ids[is_last])
+        ]
@@ -0,0 +1,87 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class DirectoryIndex:
+    """
+    Index of every file under a directory, scanned once with one 'os.scandir' call per directory spread across threads,
+    so checking thousands of paths on a network share does not cost one round trip per path.
+    Paths are also indexed in a normalised form (forward slashes, case-insensitive) so Windows-style paths match on any platform.
+    """
+    SEPARATOR_REGEX = re.compile(r'[\\/]+')
+    CURRENT_DIR_REGEX = re.compile(r'^(\./)+')
+
+    def __init__(self, root_path, max_workers = 16):
+        """
+        Parameters:
+        - root_path: The directory to index.
+        - max_workers: Number of directories scanned at the same time.
+        """
+        self.root_path = str(root_path)
+        self.max_workers = max_workers
+        self.paths = set()  # Paths relative to the root, using forward slashes
+        self.normalized_paths = dict()  # Maps the normalised form of every path to the path
+        self.errors = []
+        self._scan()
+
+    @classmethod
+    def normalize(cls, path):
+        path = cls.SEPARATOR_REGEX.sub('/', str(path).strip())
+        return cls.CURRENT_DIR_REGEX.sub('', path).strip('/').casefold()
+
+    def _scan_directory(self, relative_dir):
+        files, subdirs = [], []
+        with os.scandir(os.path.join(self.root_path, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                # Symlinked directories are not followed, a link back to a parent directory would never finish scanning
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(relative_path)
+                elif entry.is_file():
+                    files.append(relative_path)
+        return files, subdirs
+
+    def _scan(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {executor.submit(self._scan_directory, ""): ""}
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    relative_dir = running.pop(future)
+                    try:
+                        files, subdirs = future.result()
+                    except OSError as e:
+                        self.errors.append((relative_dir, str(e)))
+                        continue
+                    for relative_path in files:
+                        self.paths.add(relative_path)
+                        self.normalized_paths.setdefault(self.normalize(relative_path), relative_path)
+                    for subdir in subdirs:
+                        running[executor.submit(self._scan_directory, subdir)] = subdir
+
+    def __len__(self):
+        return len(self.paths)
+
+    def resolve(self, file_path):
+        """
+        Returns:
+        - The path, relative to the root, of the indexed file the path points to, or None if no file matches.
+        """
+        return self.normalized_paths.get(self.normalize(file_path))
+
+    def resolve_all(self, file_paths):
+        """
+        Resolves a Series of paths relative to the root in one pass.
+
+        Returns:
+        - A Series aligned with file_paths with the indexed path each one points to, or NaN if no file matches.
+        """
+        normalized = (
+            file_paths.astype(str)
+            .str.strip()
+            .str.replace(self.SEPARATOR_REGEX, '/', regex=True)
+            .str.replace(self.CURRENT_DIR_REGEX, '', regex=True)
+            .str.strip('/')
+            .str.casefold()
+        )
+        return normalized.map(self.normalized_paths)
@@ -0,0 +1,39 @@
+from classes.MatchEngine import MatchEngine
+
+class DisciplineResolver:
+    """
+    Resolves discipline IDs and names against the 'LU_Discipline' table, which is loaded once per run.
+    Every distinct value is only matched once, no matter how many processes or rows ask for it.
+    """
+    def __init__(self, disciplines, **engine_options):
+        """
+        Parameters:
+        - disciplines: Maps the ID of every discipline in 'LU_Discipline' to its name.
+        - engine_options: Options passed to the MatchEngine (scorer, cutoff, compatibility_mode).
+        """
+        self.disciplines = disciplines
+        self.names = list(disciplines.values())
+        self.name_set = set(self.names)
+        self.engine = MatchEngine(self.names, **engine_options)
+
+    def by_id(self, discipline_id):
+        return self.disciplines.get(int(discipline_id))
+
+    def by_name(self, name):
+        return name if name in self.name_set else None
+
+    def match(self, value):
+        """
+        Returns:
+        - The discipline name that matches the value exactly or most closely, or None.
+        """
+        return self.engine.match(value)
+
+    def match_all(self, values):
+        """
+        Matches a whole column of values in one batch, matching every distinct value that is not a valid discipline once.
+
+        Returns:
+        - A dictionary mapping every distinct value to its closest discipline name (or None).
+        """
+        return self.engine.match_all(values)
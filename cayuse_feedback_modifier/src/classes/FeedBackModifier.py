@@ -5,19 +5,17 @@ load_dotenv("../env/.env.development")
 import pandas as pd
 import os
 import datetime
-import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from classes.DatabaseManager import DatabaseManager
 from classes.CommentManager import CommentManager
 from classes.LogManager import LogManager
 from classes.TemplateManager import TemplateManager
-
-import sheets.attachments as attachments
-import sheets.members as members
-import sheets.awards as awards
-import sheets.proposals as proposals
-import sheets.projects as projects
-import sheets.others as others
+from classes.Process import Process
+from classes.SheetProcesses import SheetProcesses
+from methods.process_registry import discover_processes
 
 # *** Future version should make use of magic methods __enter__ and __exit__
 class FeedBackModifier:
@@ -36,17 +34,169 @@ class FeedBackModifier:
         # Initialize an instance of the CommentManager class
         self.comment_manager = CommentManager(os.getenv('EXCEL_FILE_PATH'))
 
+        # The directory the attachments are stored in, the attachment processes ask for it when it is not set
+        self.attachment_dir = os.getenv('ATTACHMENTS_PATH')
+
+        # Lookup tables shared by the processes, loaded the first time a process needs them
+        self.discipline_resolver = None
+
+        # Results of the processes that already ran in this session, keyed by (sheet name, process name)
+        self.process_results = dict()
+        self.process_timings = dict()
+
         self.init_processes()
 
     def init_processes(self):
-        all_processes = dict()
-        for sheet_methods in [awards, proposals, projects, members, attachments, others]:
-            sheet_processes = dict()
-            for fnName, fn in inspect.getmembers(sheet_methods, inspect.isfunction):
-                process = fn(self)
-                sheet_processes[process.name] = process
-            all_processes[sheet_methods.SHEET_NAME] = sheet_processes
-        self.processes = all_processes
+        # Only the names and descriptions are read up front, a sheet module is imported when one of its processes is used
+        self.processes = {
+            sheet_name: SheetProcesses(self, entries)
+            for sheet_name, entries in discover_processes().items()
+        }
+
+    def get_process(self, sheet_name, process_name):
+        if sheet_name not in self.processes:
+            raise Exception(f"The sheet '{sheet_name}' does not exist in the workbook.")
+        if process_name not in self.processes[sheet_name]:
+            raise Exception(f"The process '{process_name}' does not exist for the sheet '{sheet_name}'.")
+        return self.processes[sheet_name][process_name]
+
+    def _process_resources(self, key):
+        # Returns the resources a process modifies and the resources it only reads
+        process = self.processes[key[0]][key[1]]
+        outputs = set(process.outputs) if process.outputs is not None else {key[0], Process.DATABASE}
+        return outputs, set(process.inputs)
+
+    def _build_process_graph(self, selected_processes):
+        # Collects the selected processes and everything they depend on, dependencies before dependents
+        graph = dict()
+        def visit(key, path):
+            if key in path:
+                raise Exception(f"Circular dependency between the processes: {' -> '.join(name for sheet, name in [*path, key])}")
+            if key in graph:
+                return
+            process = self.get_process(*key)
+            for dependency in process.dependencies:
+                visit(dependency, [*path, key])
+            graph[key] = process
+        for key in selected_processes:
+            visit(tuple(key), [])
+        return graph
+
+    def _run_process(self, key, process):
+        start_time = time.perf_counter()
+        result = process.logic()
+        elapsed_time = time.perf_counter() - start_time
+        print(f"Finished '{key[1]}' ({key[0]}) in {elapsed_time:.2f}s")
+        return result, elapsed_time
+
+    def _print_timings(self, timings, total_time):
+        print(f"Process timings ({total_time:.2f}s total):")
+        for (sheet_name, process_name), elapsed_time in timings:
+            print(f"\t{elapsed_time:8.2f}s  {sheet_name} / {process_name}")
+
+    def run_processes(self, selected_processes, max_workers = 4, print_timings = True):
+        """
+        Runs the selected processes along with the processes they depend on. Every process runs at most once per session,
+        and processes whose resources do not overlap run concurrently.
+
+        Parameters:
+        - selected_processes: List of (sheet name, process name) pairs.
+        - max_workers: Maximum number of processes running at the same time.
+        - print_timings: Whether the time each process took should be printed once all of them finish.
+
+        Returns:
+        - A dictionary mapping every (sheet name, process name) pair in the graph to the value returned by its logic.
+        """
+        graph = self._build_process_graph(selected_processes)
+        pending = {key: process for key, process in graph.items() if key not in self.process_results}
+        for key in graph:
+            if key not in pending:
+                print(f"Skipping '{key[1]}' ({key[0]}), it already ran in this session")
+
+        timings = []
+        running = dict()
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                busy_outputs, busy_inputs = set(), set()
+                for running_key in running.values():
+                    outputs, inputs = self._process_resources(running_key)
+                    busy_outputs |= outputs
+                    busy_inputs |= inputs
+                # Start every process whose dependencies finished and that does not touch what a running process modifies
+                for key, process in list(pending.items()):
+                    if len(running) >= max_workers:
+                        break
+                    if not all(dependency in self.process_results for dependency in process.dependencies):
+                        continue
+                    outputs, inputs = self._process_resources(key)
+                    if outputs & (busy_outputs | busy_inputs) or inputs & busy_outputs:
+                        continue
+                    del pending[key]
+                    busy_outputs |= outputs
+                    busy_inputs |= inputs
+                    running[executor.submit(self._run_process, key, process)] = key
+                if not running:
+                    raise Exception(f"The processes {[name for sheet, name in pending]} could not be scheduled.")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key = running.pop(future)
+                    result, elapsed_time = future.result()
+                    self.process_results[key] = result
+                    self.process_timings[key] = elapsed_time
+                    timings.append((key, elapsed_time))
+
+        if timings and print_timings:
+            self._print_timings(timings, time.perf_counter() - start_time)
+        return {key: self.process_results[key] for key in graph}
+
+    def run_pipeline(self, pipeline_path):
+        """
+        Runs every step of a pipeline file in a single session, so the workbook is loaded and saved only once.
+        The file is a JSON object with a list of 'steps', each one with the 'sheet' and 'process' to run. Steps run
+        one after the other in the order they are listed unless 'parallel' is true, in which case they are scheduled together.
+
+        Parameters:
+        - pipeline_path: Path of the pipeline file.
+
+        Returns:
+        - A dictionary mapping every (sheet name, process name) pair that ran to the value returned by its logic.
+        """
+        if not os.path.isfile(pipeline_path):
+            raise Exception(f"The pipeline file '{pipeline_path}' does not exist.")
+        with open(pipeline_path, 'r') as pipeline_file:
+            pipeline = json.load(pipeline_file)
+
+        steps = pipeline.get('steps')
+        if not isinstance(steps, list) or not steps:
+            raise Exception(f"The pipeline file '{pipeline_path}' does not have any steps.")
+        selected_processes = list()
+        for index, step in enumerate(steps, start=1):
+            if not isinstance(step, dict) or not step.get('sheet') or not step.get('process'):
+                raise Exception(f"Step {index} of the pipeline must have a 'sheet' and a 'process'.")
+            selected_processes.append((step['sheet'], step['process']))
+        # Validate every step before running any of them
+        self._build_process_graph(selected_processes)
+
+        print(f"Running the pipeline '{pipeline.get('name') or os.path.basename(pipeline_path)}' ({len(selected_processes)} steps)")
+        if pipeline.get('parallel'):
+            return self.run_processes(selected_processes)
+        results = dict()
+        start_time = time.perf_counter()
+        for selected_process in selected_processes:
+            results.update(self.run_processes([selected_process], print_timings=False))
+        self._print_timings([(key, self.process_timings[key]) for key in results if key in self.process_timings], time.perf_counter() - start_time)
+        return results
+
+    # Retrieve the disciplines from the table LU_Discipline once per run
+    def get_discipline_resolver(self):
+        if self.discipline_resolver is None:
+            # Imported here so rapidfuzz is only loaded by the processes that match disciplines
+            from classes.DisciplineResolver import DisciplineResolver
+            discipline_result = self.db_manager.select_query("LU_Discipline", ["ID", "Name"])
+            self.discipline_resolver = DisciplineResolver({int(value['ID']): value['Name'] for value in discipline_result})
+        return self.discipline_resolver
 
     # Save changes to all related resources
     def save_changes(self, as_copy = True, index=False):
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+
+class FileCache:
+    """
+    Results computed from files, saved to a JSON file and keyed by the path, size and modification time of each file,
+    so a file is only processed again once it changes.
+    """
+    def __init__(self, file_path):
+        """
+        Parameters:
+        - file_path: The JSON file the cache is loaded from and saved to.
+        """
+        self.file_path = file_path
+        self.entries = self._load_existing_entries()
+        self.lock = threading.Lock()
+
+    def _load_existing_entries(self):
+        """Load the cached entries from file if they exist."""
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r') as json_file:
+                    return json.load(json_file)
+            except (IOError, json.JSONDecodeError) as e:
+                print(f"Error loading cache: {e}")
+        return {}
+
+    @staticmethod
+    def file_signature(path):
+        """
+        Returns:
+        - The (size, modification time in nanoseconds) of the file, or None if the file cannot be read.
+        """
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def get(self, path, signature):
+        """
+        Returns:
+        - The cached value for the file, or None if the file was not cached or changed since it was.
+        """
+        entry = self.entries.get(path)
+        if entry is None or (entry['size'], entry['mtime']) != tuple(signature):
+            return None
+        return entry['value']
+
+    def set(self, path, signature, value):
+        with self.lock:
+            self.entries[path] = {'size': signature[0], 'mtime': signature[1], 'value': value}
+
+    def save(self):
+        """Save the cache to the JSON file, replacing the previous file only once the new one is complete."""
+        temp_path = f"{self.file_path}.tmp"
+        try:
+            with self.lock:
+                with open(temp_path, 'w') as json_file:
+                    json.dump(self.entries, json_file)
+            os.replace(temp_path, self.file_path)
+        except IOError as e:
+            print(f"Error saving cache: {e}")
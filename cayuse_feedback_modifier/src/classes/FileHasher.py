@@ -0,0 +1,70 @@
+import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.FileCache import FileCache
+
+class FileHasher:
+    """
+    Finds files with identical content. Files are first grouped by size and only files sharing their size with another file are hashed,
+    reading them through memory maps in chunks across threads. Hashes are cached by file signature so unchanged files are never read twice.
+    """
+    def __init__(self, cache_path, max_workers = 8, chunk_size = 8 * 1024 * 1024):
+        """
+        Parameters:
+        - cache_path: The JSON file the hashes are cached in.
+        - max_workers: Number of files read at the same time.
+        - chunk_size: Number of bytes hashed at a time.
+        """
+        self.cache = FileCache(cache_path)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            # Empty files cannot be memory mapped
+            if file.seek(0, 2) == 0:
+                return digest.hexdigest()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                with memoryview(mapped_file) as view:
+                    for start in range(0, len(view), self.chunk_size):
+                        digest.update(view[start:start + self.chunk_size])
+        return digest.hexdigest()
+
+    def _cached_hash(self, path, signature):
+        digest = self.cache.get(path, signature)
+        if digest is None:
+            digest = self.hash_file(path)
+            self.cache.set(path, signature, digest)
+        return digest
+
+    def hash_same_size_files(self, paths):
+        """
+        Parameters:
+        - paths: The paths of the files to compare.
+
+        Returns:
+        - A dictionary mapping the path of every file that has the same size as another file to the hash of its content.
+          Files with a unique size cannot have a duplicate and are left out, as are files that cannot be read.
+        """
+        paths = list(dict.fromkeys(paths))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            signatures = dict(zip(paths, executor.map(FileCache.file_signature, paths)))
+
+            paths_by_size = dict()
+            for path, signature in signatures.items():
+                if signature is not None:
+                    paths_by_size.setdefault(signature[0], []).append(path)
+            candidates = [path for same_size_paths in paths_by_size.values() if len(same_size_paths) > 1 for path in same_size_paths]
+            print(f"{len(candidates)} of {len(paths)} files share their size with another file")
+
+            futures = {path: executor.submit(self._cached_hash, path, signatures[path]) for path in candidates}
+            digests = dict()
+            for path, future in futures.items():
+                try:
+                    digests[path] = future.result()
+                except OSError as e:
+                    print(f"Unable to hash the file '{path}': {e}")
+        self.cache.save()
+        return digests
@@ -0,0 +1,81 @@
+import difflib
+import os
+import numpy as np
+import rapidfuzz
+
+class MatchEngine:
+    """
+    Matches values against a list of valid choices with rapidfuzz, resolving all the distinct values of a column
+    in one batched native call instead of one difflib scan per row.
+
+    In compatibility mode every value is also matched with difflib (the matcher previously used by the processes),
+    the difflib result is returned and every value on which both matchers disagree is recorded in 'mismatches'.
+    """
+    DEFAULT_CUTOFF = 65
+
+    def __init__(self, choices, scorer = rapidfuzz.fuzz.ratio, cutoff = DEFAULT_CUTOFF, compatibility_mode = None):
+        """
+        Parameters:
+        - choices: The valid values to match against.
+        - scorer: The rapidfuzz scorer used to compare values, scoring from 0 to 100.
+        - cutoff: The minimum score for a choice to be considered a match.
+        - compatibility_mode: Whether results should be checked against difflib, defaults to the 'MATCH_COMPATIBILITY_MODE' environment variable.
+        """
+        self.choices = [str(choice) for choice in choices]
+        self.choice_set = set(self.choices)
+        self.scorer = scorer
+        self.cutoff = cutoff
+        if compatibility_mode is None:
+            compatibility_mode = (os.getenv('MATCH_COMPATIBILITY_MODE') or '').lower() in ['1', 'true', 'yes']
+        self.compatibility_mode = compatibility_mode
+        self.cache = dict()
+        self.mismatches = []
+
+    def _best_matches(self, values):
+        if not self.choices:
+            return [None for _ in values]
+        scores = rapidfuzz.process.cdist(values, self.choices, scorer=self.scorer, score_cutoff=self.cutoff, workers=-1)
+        matches = []
+        for row in scores:
+            best_score = row.max()
+            if best_score < self.cutoff or best_score == 0:
+                matches.append(None)
+            else:
+                # Ties are broken the same way difflib breaks them, in favour of the greatest choice
+                matches.append(max(self.choices[index] for index in np.flatnonzero(row == best_score)))
+        return matches
+
+    def _difflib_match(self, value):
+        closest_match = difflib.get_close_matches(value, self.choices, n=1, cutoff=self.cutoff / 100)
+        return closest_match[0] if closest_match else None
+
+    def match_all(self, values):
+        """
+        Matches a column of values, each distinct value is only matched once per engine.
+
+        Returns:
+        - A dictionary mapping every distinct string value to the choice it matches (itself when it is a valid choice) or None.
+        """
+        pending = [value for value in dict.fromkeys(values) if isinstance(value, str) and value not in self.cache and value not in self.choice_set]
+        if pending:
+            for value, closest_match in zip(pending, self._best_matches(pending)):
+                if self.compatibility_mode:
+                    difflib_match = self._difflib_match(value)
+                    if difflib_match != closest_match:
+                        self.mismatches.append((value, closest_match, difflib_match))
+                    closest_match = difflib_match
+                self.cache[value] = closest_match
+            if self.compatibility_mode:
+                print(f"Match engine compatibility: {len(self.mismatches)} value(s) matched differently than difflib so far")
+        return {value: self.match(value) for value in dict.fromkeys(values) if isinstance(value, str)}
+
+    def match(self, value):
+        """
+        Returns:
+        - The choice that matches the value exactly or most closely, or None.
+        """
+        if value in self.choice_set:
+            return value
+        if value not in self.cache:
+            self.match_all([value])
+        return self.cache.get(value)
@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from classes.FileCache import FileCache
+
+def inspect_pdf(path):
+    """
+    Opens a PDF and reads the information needed to tell whether it can be uploaded.
+    Runs in a worker process, so it only returns plain values.
+
+    Returns:
+    - A dictionary with the page count, encryption flag and size of the file, and the error raised while parsing it if any.
+    """
+    # Imported here so the parent process does not need pypdf until a worker starts
+    import pypdf
+
+    result = {'pages': None, 'encrypted': None, 'size': None, 'error': None}
+    try:
+        result['size'] = os.path.getsize(path)
+        reader = pypdf.PdfReader(path)
+        result['encrypted'] = reader.is_encrypted
+        # Encrypted files with an empty user password can still be read
+        if reader.is_encrypted and not reader.decrypt(""):
+            return result
+        result['pages'] = len(reader.pages)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+class PdfScanner:
+    """
+    Inspects PDFs in a pool of worker processes. Only a fixed number of files are queued at a time so memory stays bounded
+    however many files are scanned, and results are cached by file signature so unchanged files are never parsed twice.
+    """
+    def __init__(self, cache_path, max_workers = None, max_pending = None):
+        """
+        Parameters:
+        - cache_path: The JSON file the scan results are cached in.
+        - max_workers: Number of worker processes, defaults to the number of CPUs.
+        - max_pending: Maximum number of files queued for the workers at a time, defaults to four per worker.
+        """
+        self.cache = FileCache(cache_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+
+    def scan(self, paths, save_every = 500):
+        """
+        Parameters:
+        - paths: The paths of the PDFs to inspect.
+        - save_every: Number of newly parsed files after which the cache is saved, so an interrupted scan keeps its progress.
+
+        Returns:
+        - A dictionary mapping every path to the result of 'inspect_pdf', files that cannot be read have an error and no size.
+        """
+        results = dict()
+        signatures = dict()
+        to_parse = list()
+        for path in dict.fromkeys(paths):
+            signature = FileCache.file_signature(path)
+            if signature is None:
+                results[path] = {'pages': None, 'encrypted': None, 'size': None, 'error': "File could not be read"}
+                continue
+            cached_result = self.cache.get(path, signature)
+            if cached_result is not None:
+                results[path] = cached_result
+            else:
+                signatures[path] = signature
+                to_parse.append(path)
+
+        print(f"{len(results)} PDFs loaded from the cache, {len(to_parse)} to parse")
+        if not to_parse:
+            return results
+
+        parsed_count = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending_paths = iter(to_parse)
+            running = dict()
+            while True:
+                # Keep the queue topped up without submitting every file at once
+                for path in pending_paths:
+                    running[executor.submit(inspect_pdf, path)] = path
+                    if len(running) >= self.max_pending:
+                        break
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    results[path] = future.result()
+                    self.cache.set(path, signatures[path], results[path])
+                    parsed_count += 1
+                    if parsed_count % save_every == 0:
+                        self.cache.save()
+        self.cache.save()
+        return results
@@ -1,6 +1,21 @@
 class Process:
-    
-    def __init__(self, logic, name, description):
+    # Resource name used for processes that query or modify the database, which shares a single cursor
+    DATABASE = "database"
+
+    def __init__(self, logic, name, description, dependencies = None, outputs = None, inputs = None):
+        """
+        Parameters:
+        - logic: Function that runs the process.
+        - name: Name of the process, unique within its sheet.
+        - description: Description of what the process does.
+        - dependencies: List of (sheet name, process name) pairs of the processes that must run before this one.
+        - outputs: The sheets and resources the process modifies. None when unknown, in which case the process is
+          assumed to modify its own sheet and the database.
+        - inputs: The sheets and resources the process reads besides its outputs.
+        """
         self.logic = logic
         self.name = name
-        self.description = description
\ No newline at end of file
+        self.description = description
+        self.dependencies = [tuple(dependency) for dependency in (dependencies or [])]
+        self.outputs = outputs
+        self.inputs = inputs or []
@@ -0,0 +1,147 @@
+import builtins
+import contextlib
+import io
+import json
+import os
+import socket
+import time
+
+from methods.daemon import default_address, parse_address, send_message
+
+class ProcessServer:
+    """
+    Keeps a FeedBackModifier warm (workbook, processes, database connection and lookup caches) and runs process
+    requests received over a local socket, so each request only pays for the work of its processes.
+    Requests are handled one at a time, each one as a JSON document on its own line.
+    """
+    # Values a request can set on the modifier for its processes, in place of the ones they would ask the user for
+    REQUEST_PARAMETERS = ["attachment_dir"]
+
+    def __init__(self, modifier, address = None):
+        """
+        Parameters:
+        - modifier: The FeedBackModifier instance the requests run against.
+        - address: The Unix socket path or 'host:port' pair to listen on, defaults to default_address().
+        """
+        self.modifier = modifier
+        self.address = address or default_address()
+        self.running = False
+        self.actions = {
+            "list": self.list_processes,
+            "run": self.run,
+            "pipeline": self.run_pipeline,
+            "save": self.save,
+            "shutdown": self.shutdown
+        }
+
+    def list_processes(self, request):
+        return {
+            sheet_name: {process_name: sheet_processes.description(process_name) for process_name in sheet_processes}
+            for sheet_name, sheet_processes in self.modifier.processes.items()
+        }
+
+    @staticmethod
+    def _format_results(results):
+        return [
+            {"sheet": sheet_name, "process": process_name, "result": result}
+            for (sheet_name, process_name), result in results.items()
+        ]
+
+    def run(self, request):
+        selected_processes = [tuple(selected_process) for selected_process in request.get('processes') or []]
+        if not selected_processes:
+            raise Exception("The request does not select any processes.")
+        # The daemon is one long session, the selected processes run again unless asked otherwise
+        # while the processes they depend on keep the results of their last run
+        if request.get('rerun', True):
+            for selected_process in selected_processes:
+                self.modifier.process_results.pop(selected_process, None)
+        return self._format_results(self.modifier.run_processes(selected_processes))
+
+    def run_pipeline(self, request):
+        if not request.get('path'):
+            raise Exception("The request does not have the path of a pipeline file.")
+        # Pipelines always run every one of their steps
+        self.modifier.process_results.clear()
+        return self._format_results(self.modifier.run_pipeline(request['path']))
+
+    def save(self, request):
+        self.modifier.save_changes(as_copy=request.get('as_copy', True))
+        return "Changes saved"
+
+    def shutdown(self, request):
+        self.running = False
+        return "Shutting down"
+
+    @staticmethod
+    def _refuse_input(prompt = ""):
+        # The daemon's stdin is not the client's, so waiting for input would hang the daemon
+        raise Exception(f"The process asked for input ('{str(prompt).strip()}'), which is not available in daemon mode. Pass it in the request parameters or run the process with index.py.")
+
+    def handle_request(self, request):
+        """
+        Returns:
+        - The response to a request: whether it succeeded, its result or error, the output it printed and how long it took.
+        """
+        start_time = time.perf_counter()
+        output = io.StringIO()
+        previous_parameters = dict()
+        original_input = builtins.input
+        try:
+            if not isinstance(request, dict) or request.get('action') not in self.actions:
+                raise Exception(f"Unknown action, expected one of: {', '.join(self.actions)}")
+            parameters = request.get('params') or dict()
+            unknown_parameters = [name for name in parameters if name not in self.REQUEST_PARAMETERS]
+            if unknown_parameters:
+                raise Exception(f"Unknown parameters {', '.join(unknown_parameters)}, expected any of: {', '.join(self.REQUEST_PARAMETERS)}")
+            for name, value in parameters.items():
+                previous_parameters[name] = getattr(self.modifier, name)
+                setattr(self.modifier, name, value)
+
+            builtins.input = self._refuse_input
+            with contextlib.redirect_stdout(output):
+                result = self.actions[request['action']](request)
+            return {"ok": True, "result": result, "output": output.getvalue(), "elapsed": time.perf_counter() - start_time}
+        except Exception as e:
+            return {"ok": False, "error": str(e), "output": output.getvalue(), "elapsed": time.perf_counter() - start_time}
+        finally:
+            builtins.input = original_input
+            for name, value in previous_parameters.items():
+                setattr(self.modifier, name, value)
+
+    def handle_connection(self, connection):
+        with connection.makefile('r', encoding='utf-8') as reader, connection.makefile('w', encoding='utf-8') as writer:
+            for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    send_message(writer, {"ok": False, "error": f"The request is not valid JSON: {e}", "output": "", "elapsed": 0})
+                    continue
+                send_message(writer, self.handle_request(request))
+                if not self.running:
+                    break
+
+    def serve_forever(self):
+        family, bind_address = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(bind_address):
+            # Remove the socket file left behind by a daemon that did not shut down cleanly
+            os.remove(bind_address)
+        self.running = True
+        try:
+            with socket.socket(family, socket.SOCK_STREAM) as server:
+                server.bind(bind_address)
+                server.listen()
+                print(f"Feedback modifier daemon listening on {self.address}")
+                while self.running:
+                    connection, _ = server.accept()
+                    try:
+                        with connection:
+                            self.handle_connection(connection)
+                    except OSError as e:
+                        # A client that disconnects mid-request must not stop the daemon
+                        print(f"Connection closed unexpectedly: {e}")
+        finally:
+            if family != socket.AF_INET and os.path.exists(bind_address):
+                os.remove(bind_address)
@@ -0,0 +1,36 @@
+import importlib
+from collections.abc import Mapping
+
+class SheetProcesses(Mapping):
+    """
+    The processes of a single sheet. Names and descriptions are known up front, the sheet module is only imported
+    and a process only built the first time that process is accessed.
+    """
+    def __init__(self, modifier, entries):
+        """
+        Parameters:
+        - modifier: The FeedBackModifier instance the processes are built for.
+        - entries: Maps every process name to the module, factory function and description found by 'discover_processes'.
+        """
+        self.modifier = modifier
+        self.entries = entries
+        self.loaded = dict()
+
+    def __getitem__(self, process_name):
+        if process_name not in self.loaded:
+            entry = self.entries[process_name]
+            module = importlib.import_module(entry['module'])
+            self.loaded[process_name] = getattr(module, entry['factory'])(self.modifier)
+        return self.loaded[process_name]
+
+    def __contains__(self, process_name):
+        return process_name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def description(self, process_name):
+        return self.entries[process_name]['description']
@@ -41,6 +41,66 @@ class TemplateManager:
         else:
             raise Exception(f"The sheet with the name '{sheet_name}' does not exist in the workbook.")
 
+    def update_column(self, process_name, sheet_name, rows, col, new_values):
+        """
+        Updates the same column of several rows in one assignment, logging every cell the same way update_cell does.
+
+        Parameters:
+        - process_name: Name of the process making the change.
+        - sheet_name: Name of the sheet to update.
+        - rows: The index labels of the rows to update.
+        - col: Name of the column to update.
+        - new_values: The new values, aligned with rows.
+        """
+        if sheet_name in list(self.df.keys()):
+            rows = [int(row) for row in rows]
+            new_values = list(new_values)
+            if not rows:
+                return
+            sheet_data_frame = self.df[sheet_name]
+            prev_values = sheet_data_frame[col].reindex(rows).tolist() if col in sheet_data_frame else [None] * len(rows)
+            sheet_data_frame.loc[rows, col] = new_values
+            for row, cell_prev_value, new_val in zip(rows, prev_values, new_values):
+                self.log_manager.append_log(
+                    process_name,
+                    sheet_name,
+                    row,
+                    col,
+                    cell_prev_value,
+                    new_val
+                )
+        else:
+            raise Exception(f"The sheet with the name '{sheet_name}' does not exist in the workbook.")
+
+    def append_rows(self, process_name, sheet_name, new_rows):
+        """
+        Appends rows to the end of a sheet in one concatenation, logging every new cell.
+
+        Parameters:
+        - process_name: Name of the process making the change.
+        - sheet_name: Name of the sheet to append to.
+        - new_rows: A DataFrame or list of dictionaries with the rows to append, missing columns are left empty.
+        """
+        if sheet_name in list(self.df.keys()):
+            new_rows = pd.DataFrame(new_rows)
+            if new_rows.empty:
+                return
+            sheet_data_frame = self.df[sheet_name]
+            first_row = len(sheet_data_frame)
+            self.df[sheet_name] = pd.concat([sheet_data_frame, new_rows], ignore_index=True)
+            for offset, new_row in enumerate(new_rows.to_dict('records')):
+                for col, new_val in new_row.items():
+                    self.log_manager.append_log(
+                        process_name,
+                        sheet_name,
+                        first_row + offset,
+                        col,
+                        None,
+                        new_val
+                    )
+        else:
+            raise Exception(f"The sheet with the name '{sheet_name}' does not exist in the workbook.")
+
     def get_entry(self, sheet_name: str, identifier: str, value: any, all: bool = False):
         """
         Retrieve rows from a specified sheet based on a column's value.
@@ -0,0 +1,70 @@
+import argparse
+import os
+import socket
+import sys
+
+from methods.daemon import default_address, parse_address, send_message, read_message
+
+# Thin client for the daemon started with 'index.py --serve', it only imports the standard library so it starts instantly
+if __name__ == "__main__":
+    # Initialize the argument parser
+    parser = argparse.ArgumentParser(description="Sends process requests to a running feedback modifier daemon.")
+
+    # Add optional flags and arguments
+    parser.add_argument('--address', type=str, default=default_address(), help="The Unix socket path or 'host:port' the daemon listens on.")
+    parser.add_argument('--sheet', '-s', type=str, help="The name of the workbook sheet that the process belongs to.")
+    parser.add_argument('--process', '-p', action="append", help='Add process to call.')
+    parser.add_argument('--pipeline', type=str, help="Path of a JSON pipeline file with the sheet/process pairs to run in order.")
+    parser.add_argument('--list', action='store_true', help="List the processes of every sheet.")
+    parser.add_argument('--attachment-dir', type=str, help="The directory the attachments are stored in, for the attachment processes.")
+    parser.add_argument('--save', action='store_true', help="Save the changes made by the daemon.")
+    parser.add_argument('--shutdown', action='store_true', help="Stop the daemon.")
+
+    # Parse the arguments
+    args = parser.parse_args()
+    requests = list()
+    # The daemon cannot prompt for values, so they are sent along with the processes that need them
+    parameters = {"attachment_dir": os.path.abspath(args.attachment_dir)} if args.attachment_dir else dict()
+    if args.list:
+        requests.append({"action": "list"})
+    if args.pipeline:
+        # The daemon may run from a different directory
+        requests.append({"action": "pipeline", "path": os.path.abspath(args.pipeline), "params": parameters})
+    if args.sheet and args.process:
+        requests.append({"action": "run", "processes": [[args.sheet, process] for process in args.process], "params": parameters})
+    elif args.sheet or args.process:
+        raise Exception("Not all required arguments were passed.")
+    if args.save:
+        requests.append({"action": "save"})
+    if args.shutdown:
+        requests.append({"action": "shutdown"})
+    if not requests:
+        parser.print_help()
+        sys.exit(1)
+
+    family, connect_address = parse_address(args.address)
+    succeeded = True
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.connect(connect_address)
+        with connection.makefile('r', encoding='utf-8') as reader, connection.makefile('w', encoding='utf-8') as writer:
+            for request in requests:
+                send_message(writer, request)
+                response = read_message(reader)
+                if response is None:
+                    print("The daemon closed the connection.")
+                    succeeded = False
+                    break
+                if response.get('output'):
+                    print(response['output'], end='')
+                if not response['ok']:
+                    print(f"Error: {response['error']}")
+                    succeeded = False
+                    break
+                if request['action'] == "list":
+                    for sheet_name, sheet_processes in response['result'].items():
+                        print(sheet_name)
+                        for process_name in sheet_processes:
+                            print(f"\t{process_name}")
+                else:
+                    print(f"{request['action']} finished in {response['elapsed']:.2f}s")
+    sys.exit(0 if succeeded else 1)
@@ -1,10 +1,21 @@
+import sys
+import time
+from methods.import_timer import start_import_timer, print_import_report
+
+# The timer has to start before anything else is imported
+if '--import-time' in sys.argv:
+    start_import_timer()
+start_time = time.perf_counter()
+
 import argparse
 from classes.FeedBackModifier import FeedBackModifier
+from classes.ProcessServer import ProcessServer
 
 # Run the program
 if __name__ == "__main__":
     # Create a class instance
     my_instance = FeedBackModifier()
+    startup_time = time.perf_counter() - start_time
 
     # Initialize the argument parser
     parser = argparse.ArgumentParser(description="Parser handles command-line flags.")
@@ -12,23 +23,31 @@ if __name__ == "__main__":
     # Add optional flags and arguments
     parser.add_argument('--sheet', '-s', type=str, help="The name of the workbook sheet that the process belongs to.")
     parser.add_argument('--process', '-p', action="append", help='Add process to call.')
+    parser.add_argument('--pipeline', type=str, help="Path of a JSON pipeline file with the sheet/process pairs to run in order.")
+    parser.add_argument('--serve', action='store_true', help="Keep the program running and accept process requests from 'client.py'.")
+    parser.add_argument('--address', type=str, help="The Unix socket path or 'host:port' the daemon listens on.")
+    parser.add_argument('--import-time', action='store_true', help="Print the time spent starting up and importing modules.")
     parser.add_argument('--dev', action='store_true', help="Run process in developer mode.")
 
     # Parse the arguments
     args = parser.parse_args()
-    user_passed_args = any(val for key, val in args._get_kwargs())
+    user_passed_args = any(val for key, val in args._get_kwargs() if key != 'import_time')
     if user_passed_args:
         selected_sheet = args.sheet
         selected_processes = args.process
-        if selected_sheet and selected_processes:
-            if selected_sheet in my_instance.processes:
-                for method in selected_processes:
-                    if method in my_instance.processes[selected_sheet]:
-                        my_instance.processes[selected_sheet][method].logic()
-                    else:
-                        raise Exception(f"The process '{method}' does not exist for the sheet '{selected_sheet}'.")
-            else:
-                raise Exception(f"The sheet '{selected_sheet}' does not exist in the workbook.")
+        if args.serve:
+            # The workbook, database connection and caches stay loaded between requests, changes are saved on request
+            ProcessServer(my_instance, args.address).serve_forever()
+        elif args.pipeline:
+            # Every step of the pipeline shares the same workbook, database connection and save
+            my_instance.run_pipeline(args.pipeline)
+
+            # Save changes
+            if not args.dev:
+                my_instance.save_changes()
+        elif selected_sheet and selected_processes:
+            # Processes run along with their dependencies, each one at most once
+            my_instance.run_processes([(selected_sheet, method) for method in selected_processes])
             
             # Save changes
             if not args.dev:
@@ -69,11 +88,15 @@ if __name__ == "__main__":
                                     availabile_sheet_processes.pop(numeric_process - 1)
                             else:
                                 print("Invalid process selected.")
-                        for process in selected_processes:
-                            my_instance.processes[process_sheets[numeric_sheet]][process].logic()
+                        my_instance.run_processes([(process_sheets[numeric_sheet], process) for process in selected_processes])
                     else:
                         print("Invalid sheet selected.")
                 case 2:
                     print('view')
                 case _:
-                    print("Invalid action selected.")
\ No newline at end of file
+                    print("Invalid action selected.")
+
+    # Includes the modules imported while the processes ran
+    if args.import_time:
+        print(f"Startup time: {startup_time:.3f}s")
+        print_import_report()
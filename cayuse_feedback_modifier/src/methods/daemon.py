@@ -0,0 +1,45 @@
+import json
+import os
+import socket
+import tempfile
+
+# Only the standard library is imported here so the client starts without loading pandas or the database driver
+DEFAULT_TCP_ADDRESS = "127.0.0.1:8765"
+
+def default_address():
+    """
+    Returns:
+    - The address the daemon listens on: the 'FEEDBACK_MODIFIER_ADDRESS' environment variable if set, otherwise a
+      Unix socket in the temporary directory, or a loopback TCP port where Unix sockets are not available.
+    """
+    if os.getenv('FEEDBACK_MODIFIER_ADDRESS'):
+        return os.getenv('FEEDBACK_MODIFIER_ADDRESS')
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(tempfile.gettempdir(), 'cayuse_feedback_modifier.sock')
+    return DEFAULT_TCP_ADDRESS
+
+def parse_address(address):
+    """
+    Parameters:
+    - address: Either the path of a Unix socket or a 'host:port' pair.
+
+    Returns:
+    - A tuple with the socket family and the address in the format the socket expects.
+    """
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise Exception(f"Unix sockets are not available on this platform, use a 'host:port' address instead of '{address}'.")
+    return socket.AF_UNIX, address
+
+def send_message(writer, message):
+    # Messages are exchanged as one JSON document per line
+    writer.write(json.dumps(message, default=str) + "\n")
+    writer.flush()
+
+def read_message(reader):
+    line = reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
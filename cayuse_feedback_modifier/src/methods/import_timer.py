@@ -0,0 +1,38 @@
+import builtins
+import sys
+import time
+
+# Import times recorded since 'start_import_timer' was called, as (module name, seconds, nesting depth) tuples
+IMPORT_TIMES = []
+_import_depth = [0]
+_original_import = builtins.__import__
+
+def _timed_import(name, globals = None, locals = None, fromlist = (), level = 0):
+    # Only the first import of a module takes time, later ones are dictionary lookups
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _import_depth[0] += 1
+    start_time = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth[0] -= 1
+        IMPORT_TIMES.append((name, time.perf_counter() - start_time, _import_depth[0]))
+
+def start_import_timer():
+    """
+    Records how long every module imported from now on takes to import, including the modules it imports.
+    """
+    builtins.__import__ = _timed_import
+
+def print_import_report(limit = 15):
+    """
+    Prints the total time spent importing modules and the modules that took the longest.
+
+    Parameters:
+    - limit: The number of modules to list.
+    """
+    top_level_time = sum(elapsed_time for name, elapsed_time, depth in IMPORT_TIMES if depth == 0)
+    print(f"Import time: {top_level_time:.3f}s across {len(IMPORT_TIMES)} modules")
+    for name, elapsed_time, depth in sorted(IMPORT_TIMES, key=lambda import_time: import_time[1], reverse=True)[:limit]:
+        print(f"\t{elapsed_time:8.3f}s  {name}")
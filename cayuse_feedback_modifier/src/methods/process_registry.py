@@ -0,0 +1,69 @@
+import ast
+import os
+
+SHEETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sheets')
+# The sheet modules in the order their processes are listed
+SHEET_MODULES = ['awards', 'proposals', 'projects', 'members', 'attachments', 'others']
+
+def _constant_string(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+def _read_factory(function):
+    # Finds the name and description of the Process a factory returns, without running it
+    local_strings = dict()
+    for node in ast.walk(function):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = _constant_string(node.value)
+            if value is not None:
+                local_strings.setdefault(node.targets[0].id, value)
+    for node in function.body:
+        if isinstance(node, ast.Return) and isinstance(node.value, ast.Call):
+            call = node.value
+            if isinstance(call.func, ast.Name) and call.func.id == "Process" and len(call.args) >= 2:
+                name_node = call.args[1]
+                name = _constant_string(name_node) or (local_strings.get(name_node.id) if isinstance(name_node, ast.Name) else None)
+                description = (_constant_string(call.args[2]) if len(call.args) >= 3 else None) or ""
+                if name:
+                    return name, description
+    return None
+
+def discover_processes(sheets_dir = SHEETS_DIR, sheet_modules = SHEET_MODULES):
+    """
+    Reads the processes every sheet module defines by parsing its source instead of importing it,
+    so listing processes does not import the heavy dependencies of every sheet.
+
+    Parameters:
+    - sheets_dir: The directory with the sheet modules.
+    - sheet_modules: The names of the sheet modules to read.
+
+    Returns:
+    - A dictionary mapping every sheet name to a dictionary with the module, factory function and description of each of its processes.
+    """
+    registry = dict()
+    for module_name in sheet_modules:
+        file_name = f"{module_name}.py"
+        with open(os.path.join(sheets_dir, file_name), 'r', encoding='utf-8') as sheet_file:
+            module = ast.parse(sheet_file.read(), filename=file_name)
+
+        sheet_name = None
+        for node in module.body:
+            if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == "SHEET_NAME" for target in node.targets):
+                sheet_name = _constant_string(node.value)
+        if not sheet_name:
+            continue
+
+        sheet_processes = dict()
+        # Factories are read in alphabetical order, the same order 'inspect.getmembers' used to return them
+        for node in sorted((node for node in module.body if isinstance(node, ast.FunctionDef)), key=lambda node: node.name):
+            process_info = _read_factory(node)
+            if process_info:
+                process_name, description = process_info
+                sheet_processes[process_name] = {
+                    "module": f"sheets.{module_name}",
+                    "factory": node.name,
+                    "description": description
+                }
+        registry[sheet_name] = sheet_processes
+    return registry
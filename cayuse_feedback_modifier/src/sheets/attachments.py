@@ -1,47 +1,153 @@
 import os
-import pypdf
 import pathlib
-import math
-from methods import utils
+import numpy as np
+import pandas as pd
 from classes.Process import Process
+from classes.DirectoryIndex import DirectoryIndex
+from classes.PdfScanner import PdfScanner
+from classes.FileHasher import FileHasher
 
 SHEET_NAME = "Attachments - Template"
+# Number of other projects named in the comment of a duplicate attachment
+LISTED_DUPLICATES = 5
+
+def _index_attachment_directory(self):
+    # Request from user the path to the base directory where the attachments are stored, unless it was already provided
+    input_path = self.attachment_dir or input("Input the path of the directory where the attachments are stored: ")
+    dir_path = pathlib.Path(input_path)
+    if not dir_path.is_dir():
+        raise Exception("Invalid directory provided")
+
+    # Scan the directory once instead of checking every file on the share
+    directory_index = DirectoryIndex(dir_path)
+    print(f"Indexed {len(directory_index)} files in '{dir_path}'")
+    for relative_dir, error in directory_index.errors:
+        print(f"Unable to read the directory '{relative_dir}': {error}")
+    return dir_path, directory_index
+
+def _resolve_attachment_paths(dir_path, directory_index, file_paths):
+    # Full paths of the attachments that point to an existing file, missing files are reported by 'Verify Attachment Existance'
+    full_paths = directory_index.resolve_all(file_paths).map(lambda relative_path: os.path.join(dir_path, relative_path), na_action='ignore')
+    is_absolute = full_paths.isna() & file_paths.map(lambda file_path: isinstance(file_path, str) and os.path.isabs(file_path))
+    return full_paths.where(~is_absolute, file_paths).dropna()
+
+def _cache_path(file_name):
+    return os.path.join(os.getenv('SAVE_PATH') or os.path.dirname(os.path.abspath(os.getenv('EXCEL_FILE_PATH'))), file_name)
 
 def verify_entries(self):
     def logic():
-        # Request from user the path to the base directory where the attachments are stored
-        input_path = input("Input the path of the directory where the attachments are stored: ")
-        dir_path = pathlib.Path(input_path)
-        if not dir_path.is_dir():
-            raise Exception("Invalid directory provided")
-        
+        dir_path, directory_index = _index_attachment_directory(self)
+
         # Store the sheet's content
         sheet_content = self.template_manager.df[SHEET_NAME]
-        # Loop through every row in the sheet
-        for index, row in sheet_content.iterrows():
-            # Retrieve the record's filepath
-            file_path = row['filePath']
-            if not isinstance(file_path, float):
-                full_path = os.path.join(dir_path, file_path)
-                if not os.path.isfile(full_path):
-                    self.comment_manager.append_comment(
-                        SHEET_NAME,
-                        index + 1,
-                        sheet_content.columns.get_loc('filePath'),
-                        "File path does not point to an existing file."
-                    )
-            else:
-                self.comment_manager.append_comment(
-                    SHEET_NAME,
-                    index + 1,
-                    sheet_content.columns.get_loc('filePath'),
-                    "Record is missing filePath"
-                )
+        file_paths = sheet_content['filePath']
+        is_missing = file_paths.map(lambda file_path: isinstance(file_path, float)).to_numpy()
+        is_found = directory_index.resolve_all(file_paths).notna().to_numpy()
+        # Absolute paths do not point inside the directory and are checked one by one
+        for position in np.flatnonzero(~is_missing & ~is_found):
+            file_path = file_paths.iloc[position]
+            if os.path.isabs(str(file_path)):
+                is_found[position] = os.path.isfile(file_path)
+
+        file_path_col = sheet_content.columns.get_loc('filePath')
+        for mask, message in [
+            (~is_missing & ~is_found, "File path does not point to an existing file."),
+            (is_missing, "Record is missing filePath")
+        ]:
+            document_rows = sheet_content.index.to_numpy()[mask] + 1
+            self.comment_manager.append_comments(SHEET_NAME, document_rows, [file_path_col] * len(document_rows), [message] * len(document_rows))
 
     return Process(
         logic,
         "Verify Attachment Existance",
-        "The process goes through every attachment record in the Attachment sheet and validates that the 'filePath' for each record represents an existing file in the local machine."
+        "The process goes through every attachment record in the Attachment sheet and validates that the 'filePath' for each record represents an existing file in the local machine.",
+        outputs=[SHEET_NAME]
+    )
+
+def scan_pdf_attachments(self):
+    def logic():
+        dir_path, directory_index = _index_attachment_directory(self)
+        sheet_content = self.template_manager.df[SHEET_NAME]
+        file_paths = sheet_content['filePath']
+
+        full_paths = _resolve_attachment_paths(dir_path, directory_index, file_paths)
+        full_paths = full_paths[full_paths.map(lambda full_path: full_path.lower().endswith('.pdf'))]
+        if full_paths.empty:
+            print("No PDF attachments to scan")
+            return
+
+        results = PdfScanner(_cache_path('cayuse_attachment_pdf_cache.json')).scan(full_paths.tolist())
+
+        document_rows, messages = list(), list()
+        for index, full_path in full_paths.items():
+            result = results[full_path]
+            problems = list()
+            if result['error']:
+                problems.append(f"PDF could not be parsed ({result['error']}).")
+            else:
+                if result['size'] == 0:
+                    problems.append("PDF file is empty.")
+                if result['encrypted']:
+                    problems.append("PDF is encrypted." if result['pages'] is not None else "PDF is encrypted and cannot be opened without a password.")
+                if result['pages'] == 0:
+                    problems.append("PDF has no pages.")
+            if problems:
+                document_rows.append(index + 1)
+                messages.append(" ".join(problems))
+
+        print(f"Scanned {len(results)} PDFs, {len(messages)} attachment records have problems")
+        file_path_col = sheet_content.columns.get_loc('filePath')
+        self.comment_manager.append_comments(SHEET_NAME, document_rows, [file_path_col] * len(document_rows), messages)
+
+    return Process(
+        logic,
+        "Scan PDF Attachments",
+        "The process opens every PDF referenced by the 'filePath' of the records in the Attachment sheet and comments on the files that are corrupt, encrypted, empty or have no pages. Results are cached so unchanged files are not parsed again.",
+        outputs=[SHEET_NAME]
+    )
+
+def find_duplicate_attachments(self):
+    def logic():
+        dir_path, directory_index = _index_attachment_directory(self)
+        sheet_content = self.template_manager.df[SHEET_NAME]
+        full_paths = _resolve_attachment_paths(dir_path, directory_index, sheet_content['filePath'])
+
+        digests = FileHasher(_cache_path('cayuse_attachment_hash_cache.json')).hash_same_size_files(full_paths.tolist())
+        hashed_rows = pd.DataFrame({
+            'digest': full_paths.map(digests),
+            'projectLegacyNumber': sheet_content.loc[full_paths.index, 'projectLegacyNumber'],
+            'filePath': sheet_content.loc[full_paths.index, 'filePath']
+        }).dropna(subset=['digest'])
+        # Only content shared by more than one grant is a duplicate upload
+        project_counts = hashed_rows.groupby('digest')['projectLegacyNumber'].transform('nunique')
+        duplicate_rows = hashed_rows[project_counts > 1]
+
+        # The first projects of every digest are listed once, every record then leaves its own project out of that listing
+        projects = duplicate_rows.drop_duplicates(['digest', 'projectLegacyNumber'])
+        listings = projects.assign(
+            entry="'" + projects['filePath'].astype(str) + "' (" + projects['projectLegacyNumber'].astype(str) + ")"
+        ).groupby('digest', sort=False).agg(
+            listed_projects=('projectLegacyNumber', lambda column: list(column[:LISTED_DUPLICATES + 1])),
+            listed_entries=('entry', lambda column: list(column[:LISTED_DUPLICATES + 1])),
+            num_projects=('projectLegacyNumber', 'size')
+        )
+        duplicate_rows = duplicate_rows.join(listings, on='digest')
+
+        messages = list()
+        for project, listed_projects, listed_entries, num_projects in zip(duplicate_rows['projectLegacyNumber'], duplicate_rows['listed_projects'], duplicate_rows['listed_entries'], duplicate_rows['num_projects']):
+            others = [entry for listed_project, entry in zip(listed_projects, listed_entries) if listed_project != project][:LISTED_DUPLICATES]
+            remaining = f" and {num_projects - 1 - LISTED_DUPLICATES} more" if num_projects - 1 > LISTED_DUPLICATES else ""
+            messages.append(f"File is identical to the attachments of other projects: {', '.join(others)}{remaining}.")
+
+        print(f"Found {duplicate_rows['digest'].nunique()} files attached to more than one project across {len(duplicate_rows)} attachment records")
+        file_path_col = sheet_content.columns.get_loc('filePath')
+        self.comment_manager.append_comments(SHEET_NAME, duplicate_rows.index + 1, [file_path_col] * len(duplicate_rows), messages)
+
+    return Process(
+        logic,
+        "Find Duplicate Attachments",
+        "The process compares the content of every file referenced by the 'filePath' of the records in the Attachment sheet and comments on the records whose file is byte-identical to a file attached to a different projectLegacyNumber.",
+        outputs=[SHEET_NAME]
     )
 
 def missing_project_attachments(self):
@@ -53,49 +159,64 @@ def missing_project_attachments(self):
         proposal_sheet_content = self.template_manager.df[proposal_sheet_name]
         attachment_sheet_content = self.template_manager.df[SHEET_NAME]
 
-        # dict with keep track of how many attachments each project has in the 'Attachments' sheet
-        attachment_counter = dict()
-        for index, project in [*award_sheet_content.iterrows(), *proposal_sheet_content.iterrows()]:
-            attachment_counter[project['projectLegacyNumber']] = {
-                'legacy_number': project['proposalLegacyNumber'],
-                'num_attachments': 0
-            }
-            
-        for index, row in attachment_sheet_content.iterrows():
-            if row['projectLegacyNumber'] in attachment_counter:
-                attachment_counter[row['projectLegacyNumber']]['num_attachments'] += 1
-            else:
-                self.comment_manager.append_comment(
-                    SHEET_NAME,
-                    index + 1,
-                    attachment_sheet_content.columns.get_loc('projectLegacyNumber'),
-                    f"Grant with projectLegacyNumber '{row['projectLegacyNumber']}' does not exist in either the 'Proposal' or 'Award' sheets."
-                )
+        # Every grant in the 'Proposal' and 'Award' sheets, in order of first appearance with the legacy number of its last appearance
+        projects = pd.concat([
+            award_sheet_content[['projectLegacyNumber', 'proposalLegacyNumber']],
+            proposal_sheet_content[['projectLegacyNumber', 'proposalLegacyNumber']]
+        ], ignore_index=True)
+        projects = projects[projects['projectLegacyNumber'].notna()].astype({'projectLegacyNumber': object})
+        legacy_numbers = projects.drop_duplicates('projectLegacyNumber', keep='last').set_index('projectLegacyNumber')['proposalLegacyNumber']
+        projects = projects.drop_duplicates('projectLegacyNumber')[['projectLegacyNumber']]
+        projects['legacyNumber'] = projects['projectLegacyNumber'].map(legacy_numbers)
 
-        new_rows = list()
-        for key, props in attachment_counter.items():
-            if props['num_attachments'] == 0:
-                new_rows.append({
-                    'projectLegacyNumber': key,
-                    'legacyNumber': props['legacy_number']
-                })
-            elif props['num_attachments'] < 3:
-                first_record = attachment_sheet_content.loc[attachment_sheet_content['projectLegacyNumber'] == key].index[0]
-                self.comment_manager.append_comment(
-                    SHEET_NAME,
-                    first_record + 1,
-                    attachment_sheet_content.columns.get_loc('projectLegacyNumber'),
-                    f"Only {props['num_attachments']} attachment records exist with the projectLegacyNumber {key}."
-                )
+        # Number of attachments and first attachment row of every grant
+        attachment_projects = attachment_sheet_content['projectLegacyNumber'].astype(object)
+        attachment_counts = (
+            pd.DataFrame({'projectLegacyNumber': attachment_projects, 'first_row': attachment_sheet_content.index})
+            .groupby('projectLegacyNumber', sort=False)['first_row']
+            .agg(num_attachments='size', first_row='first')
+            .reset_index()
+        )
+        projects = projects.merge(attachment_counts, on='projectLegacyNumber', how='left')
+        projects['num_attachments'] = projects['num_attachments'].fillna(0).astype(int)
+
+        project_col = attachment_sheet_content.columns.get_loc('projectLegacyNumber')
+        # Empty keys never match a grant, they are reported as missing instead of as unknown grants
+        has_project = (attachment_projects.notna() & (attachment_projects.astype(str).str.strip() != '')).to_numpy()
+        missing_projects = attachment_projects[~has_project]
+        self.comment_manager.append_comments(
+            SHEET_NAME,
+            missing_projects.index + 1,
+            [project_col] * len(missing_projects),
+            ["Attachment record is missing a projectLegacyNumber."] * len(missing_projects)
+        )
+
+        is_orphan = has_project & ~attachment_projects.isin(projects['projectLegacyNumber']).to_numpy()
+        orphan_projects = attachment_projects[is_orphan]
+        self.comment_manager.append_comments(
+            SHEET_NAME,
+            orphan_projects.index + 1,
+            [project_col] * len(orphan_projects),
+            [f"Grant with projectLegacyNumber '{project}' does not exist in either the 'Proposal' or 'Award' sheets." for project in orphan_projects]
+        )
+
+        under_attached = projects[(projects['num_attachments'] > 0) & (projects['num_attachments'] < 3)]
+        self.comment_manager.append_comments(
+            SHEET_NAME,
+            under_attached['first_row'].astype(int) + 1,
+            [project_col] * len(under_attached),
+            [f"Only {num_attachments} attachment records exist with the projectLegacyNumber {project}." for project, num_attachments in zip(under_attached['projectLegacyNumber'], under_attached['num_attachments'])]
+        )
 
-        if new_rows:
-            self.template_manager.df[SHEET_NAME] = self.template_manager.df[SHEET_NAME].__append(new_rows, ignore_index=True)
-            self.log_manager.append_logs(SHEET_NAME, process_name, list(new_rows))
+        new_rows = projects.loc[projects['num_attachments'] == 0, ['projectLegacyNumber', 'legacyNumber']]
+        self.template_manager.append_rows(process_name, SHEET_NAME, new_rows)
 
     return Process(
         logic,
         process_name,
-        "The process goes through every record in the 'Proposal' and 'Award' sheet and determines the grants that are missing from the 'Attachment' sheet."
+        "The process goes through every record in the 'Proposal' and 'Award' sheet and determines the grants that are missing from the 'Attachment' sheet.",
+        outputs=[SHEET_NAME],
+        inputs=['Proposal - Template', 'Award - Template']
     )
 
 def populate_project_info(self):
@@ -3,6 +3,7 @@ import re
 import pandas as pd
 from methods import utils
 from classes.Process import Process
+from classes.AdminUnitResolver import AdminUnitResolver
 
 SHEET_NAME = "Award - Template"
 
@@ -98,12 +99,11 @@ def populate_template_discipline(self):
         # Retrieve the content of the proposal sheet
         proposal_sheet_content = self.template_manager.df[SHEET_NAME]
 
-        # Retrieve the disciplines from the table LU_Discipline in the database
-        discipline_result = self.db_manager.select_query(
-            "LU_Discipline",
-            ["Name"]
-        )
-        valid_disciplines = [value['Name'] for value in discipline_result]
+        # Retrieve the disciplines from the table LU_Discipline, which is only queried once per run
+        discipline_resolver = self.get_discipline_resolver()
+        valid_disciplines = discipline_resolver.name_set
+        # Match every distinct discipline of the template once
+        discipline_resolver.match_all(proposal_sheet_content['Discipline'])
 
         last_index = 0
         batch_limit = 40
@@ -122,6 +122,7 @@ def populate_template_discipline(self):
                 *batch_ids
             )
             project_disciplines = { project['Grant_ID']:project['Discipline'] for project in search_result }
+            discipline_resolver.match_all(project_disciplines.values())
 
             for document_index, record in batch_records.iterrows():
                 record_grant_id = record['proposalLegacyNumber']
@@ -129,7 +130,7 @@ def populate_template_discipline(self):
                 # Check if the database returned a record with the id
                 if record_grant_id in project_disciplines:
                     if project_disciplines[record_grant_id] and project_disciplines[record_grant_id] not in valid_disciplines:
-                        closest_valid_discipline = utils.find_closest_match(project_disciplines[record_grant_id], valid_disciplines)
+                        closest_valid_discipline = discipline_resolver.match(project_disciplines[record_grant_id])
                         if closest_valid_discipline:
                             self.db_manager.update_query(
                                 process_name,
@@ -143,7 +144,7 @@ def populate_template_discipline(self):
                     # Retrueve the discipline of the record present in the template file
                     template_record_discipline = proposal_sheet_content['Discipline'][document_index]
                     if template_record_discipline and not pd.isna(template_record_discipline) and template_record_discipline not in valid_disciplines:
-                        closest_valid_discipline = utils.find_closest_match(template_record_discipline, valid_disciplines)
+                        closest_valid_discipline = discipline_resolver.match(template_record_discipline)
                         if closest_valid_discipline:
                             self.template_manager.update_cell(
                                 process_name,
@@ -252,9 +253,13 @@ def populate_template_department(self):
                 'Primary Code': center['Admin Unit Code']
             } 
         for index, center in centers_file_content.iterrows() }
+        # Matches the departments and centers of the records, each distinct value is only matched once
+        department_resolver = AdminUnitResolver.from_file_contents(dept_file_content, centers_file_content)
 
         # Retrieve the content of the proposal sheet
         proposal_sheet_content = self.template_manager.df[SHEET_NAME]
+        # Match every distinct admin unit of the template in one batch
+        department_resolver.match_all(proposal_sheet_content['Admin Unit'])
 
         last_index = 0
         batch_limit = 40
@@ -273,6 +278,7 @@ def populate_template_department(self):
                 batch_ids
             )
             project_departments = { project['Grant_ID']:project['Primary_Dept'] for project in search_result }
+            department_resolver.match_all(project_departments.values())
 
             # Loop through every grand_id in the batch
             for index, id in enumerate(batch_ids):
@@ -281,7 +287,7 @@ def populate_template_department(self):
                 # Check if the database returned a record with the id
                 if id in project_departments:
                     if project_departments[id] and project_departments[id] not in valid_departments:
-                        closest_valid_dept = utils.find_closest_match(project_departments[id], [dept for dept in valid_departments])
+                        closest_valid_dept = department_resolver.match_unit(project_departments[id])
                         if closest_valid_dept:
                             self.db_manager.update_cell(
                                 process_name,
@@ -296,7 +302,7 @@ def populate_template_department(self):
                     template_record_unit_code = proposal_sheet_content['Admin Unit Primary Code'][document_index]
                     template_record_unit = proposal_sheet_content['Admin Unit'][document_index]
                     if template_record_unit and not pd.isna(template_record_unit) and template_record_unit not in valid_departments:
-                        closest_valid_dept = utils.find_closest_match(template_record_unit, [dept for dept in valid_departments])
+                        closest_valid_dept = department_resolver.match_unit(template_record_unit)
                         if closest_valid_dept:
                             closest_valid_dept_code = valid_departments[closest_valid_dept]
                             self.template_manager.update_cell(
@@ -316,7 +322,7 @@ def populate_template_department(self):
                             template_record_unit = closest_valid_dept
                             template_record_unit_code = closest_valid_dept_code
                         else:
-                            closest_valid_center = utils.find_closest_match(template_record_unit, [center for center in valid_centers])
+                            closest_valid_center = department_resolver.match_center(template_record_unit)
                             if closest_valid_center:
                                 center_info = valid_centers[closest_valid_center]
                                 self.template_manager.update_cell(
@@ -8,60 +8,65 @@ SHEET_NAME = "Project - Template"
 def populate_project_status(self):
     process_name = "Populate Template Status"
     def logic():
-        # Call the same process for the Proposals sheet
-        # The process for the Project sheet relies on data from said sheet and should be called as a precaution
-        self.processes['Proposal - Template'][process_name].logic()
-        
         project_sheet_content = self.template_manager.df[SHEET_NAME]
         proposal_sheet_content = self.template_manager.df["Proposal - Template"]
 
-        for document_index, record in project_sheet_content.iterrows():
-            record_pln = record['projectLegacyNumber']
-            record_search = proposal_sheet_content.loc[proposal_sheet_content['projectLegacyNumber'] == record_pln]
-            if not record_search.empty:
-                correlating_proposal_record = record_search.iloc[0]
-                proposal_record_status = correlating_proposal_record['status']
-                if not pd.isna(proposal_record_status):
-                    self.template_manager.update_cell(
-                        process_name,
-                        SHEET_NAME,
-                        document_index,
-                        "status",
-                        proposal_record_status
-                    )
-                else:
-                    self.comment_manager.append_comment(
-                        SHEET_NAME,
-                        document_index + 1,
-                        project_sheet_content.columns.get_loc('status'),
-                        f"The record does not have a status assigned to it in the Proposal sheet."
-                    )
-                proposal_record_oar = correlating_proposal_record['OAR Status']
-                if not pd.isna(proposal_record_oar):
-                    self.template_manager.update_cell(
-                        process_name,
-                        SHEET_NAME,
-                        document_index,
-                        "OAR Status",
-                        proposal_record_oar
-                    )
-                else:
-                    self.comment_manager.append_comment(
-                        SHEET_NAME,
-                        document_index + 1,
-                        project_sheet_content.columns.get_loc('OAR Status'),
-                        f"The record does not have an OAR Status assigned to it in the Proposal sheet."
-                    )
-            else:
-                self.comment_manager.append_comment(
-                    SHEET_NAME,
-                    document_index + 1,
-                    project_sheet_content.columns.get_loc('projectLegacyNumber'),
-                    f"The record with the projectLegacyNumber {record_pln} does not exist in the proposal sheet."
-                )
+        # Join every project to the first proposal that shares its projectLegacyNumber
+        # Keys are compared as objects so 1001 and 1001.0 still match, and empty keys never match
+        proposal_records = proposal_sheet_content.loc[
+            proposal_sheet_content['projectLegacyNumber'].notna(),
+            ['projectLegacyNumber', 'status', 'OAR Status']
+        ]
+        proposal_records = proposal_records.assign(
+            projectLegacyNumber=proposal_records['projectLegacyNumber'].astype(object)
+        ).drop_duplicates('projectLegacyNumber')
+        project_keys = pd.DataFrame({'projectLegacyNumber': project_sheet_content['projectLegacyNumber'].astype(object).to_numpy()})
+        matched_records = project_keys.merge(proposal_records, how='left', on='projectLegacyNumber', indicator=True)
 
+        project_index = project_sheet_content.index.to_numpy()
+        is_matched = (matched_records['_merge'] == 'both').to_numpy()
+        has_status = matched_records['status'].notna().to_numpy()
+        has_oar = matched_records['OAR Status'].notna().to_numpy()
+
+        def add_comments(mask, col, messages):
+            if mask.any():
+                document_rows = project_index[mask] + 1
+                col_index = project_sheet_content.columns.get_loc(col)
+                if isinstance(messages, str):
+                    messages = [messages] * len(document_rows)
+                self.comment_manager.append_comments(SHEET_NAME, document_rows, [col_index] * len(document_rows), messages)
+
+        update_status = is_matched & has_status
+        self.template_manager.update_column(
+            process_name,
+            SHEET_NAME,
+            project_index[update_status],
+            "status",
+            matched_records['status'][update_status]
+        )
+        add_comments(is_matched & ~has_status, 'status', f"The record does not have a status assigned to it in the Proposal sheet.")
+
+        update_oar = is_matched & has_oar
+        self.template_manager.update_column(
+            process_name,
+            SHEET_NAME,
+            project_index[update_oar],
+            "OAR Status",
+            matched_records['OAR Status'][update_oar]
+        )
+        add_comments(is_matched & ~has_oar, 'OAR Status', f"The record does not have an OAR Status assigned to it in the Proposal sheet.")
+
+        add_comments(~is_matched, 'projectLegacyNumber', [
+            f"The record with the projectLegacyNumber {record_pln} does not exist in the proposal sheet."
+            for record_pln in project_sheet_content['projectLegacyNumber'][~is_matched]
+        ])
+
+    # The process relies on the statuses the same process determines for the Proposals sheet
     return Process(
         logic,
         process_name,
-        ""
-    )
\ No newline at end of file
+        "",
+        dependencies=[("Proposal - Template", process_name)],
+        outputs=[SHEET_NAME],
+        inputs=["Proposal - Template"]
+    )
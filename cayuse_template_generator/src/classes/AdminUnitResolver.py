@@ -0,0 +1,80 @@
+from methods.utils import find_closest_match
+
+class AdminUnitResolver:
+    """
+    Resolves department strings to their admin unit, admin unit code and John Jay center using lookups
+    prepared once from the org units and centers, memoising the result of every distinct department string.
+    """
+    def __init__(self, units, centers, matcher = find_closest_match):
+        """
+        Parameters:
+        - units: Maps the name of every admin unit to its code.
+        - centers: Maps the name of every center to a tuple with the name and code of the admin unit it belongs to.
+        - matcher: Function that returns the closest match of a string within a list of strings, or None.
+        """
+        self.units = {str(name): code for name, code in units.items()}
+        self.centers = {str(name): center for name, center in centers.items()}
+        self.unit_names = list(self.units.keys())
+        self.center_names = list(self.centers.keys())
+        self.matcher = matcher
+        self.unit_cache = dict()
+        self.center_cache = dict()
+        self.cache = dict()
+
+    def match_unit(self, department):
+        """
+        Returns:
+        - The name of the admin unit that matches the department exactly or most closely, or None.
+        """
+        if department in self.units:
+            return department
+        if department not in self.unit_cache:
+            self.unit_cache[department] = self.matcher(department, self.unit_names)
+        return self.unit_cache[department]
+
+    def match_center(self, department):
+        """
+        Returns:
+        - The name of the center that matches the department exactly or most closely, or None.
+        """
+        if department in self.centers:
+            return department
+        if department not in self.center_cache:
+            self.center_cache[department] = self.matcher(department, self.center_names)
+        return self.center_cache[department]
+
+    def resolve(self, department):
+        """
+        Resolves a department to an admin unit first and to a center when no admin unit matches.
+
+        Returns:
+        - A tuple with the admin unit, the admin unit code, the center and the reason the department could not be resolved.
+          The first three are None when the department could not be resolved, the last one is None when it could.
+        """
+        if not department:
+            return None, None, None, "Grant does not have a primary department in the database."
+        if department not in self.cache:
+            try:
+                self.cache[department] = self._resolve(department)
+            except Exception as e:
+                self.cache[department] = (None, None, None, str(e))
+        return self.cache[department]
+
+    def _resolve(self, department):
+        unit_name = self.match_unit(department)
+        if unit_name:
+            return unit_name, self.units[unit_name], None, None
+        center_name = self.match_center(department)
+        if center_name:
+            unit_name, unit_code = self.centers[center_name]
+            return unit_name, unit_code, center_name, None
+        return None, None, None, f"Failed to determine a valid department for {department}"
+
+    def resolve_all(self, departments):
+        """
+        Resolves a list of departments, matching every distinct department once.
+
+        Returns:
+        - A list of (unit, code, center, error) tuples aligned with the departments.
+        """
+        return [self.resolve(department) for department in departments]
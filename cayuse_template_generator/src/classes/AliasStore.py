@@ -0,0 +1,80 @@
+from datetime import datetime
+import sqlite3
+
+class AliasStore:
+    """
+    SQLite backed store of the PI strings that were resolved to a username and association during previous runs,
+    so that they can be resolved again without going back to the feedback workbook.
+    """
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                pi_string TEXT PRIMARY KEY,
+                username TEXT,
+                association TEXT,
+                source TEXT,
+                learned_at TEXT,
+                updated_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def load(self):
+        """
+        Returns:
+        - A dictionary of every stored alias keyed by PI string, in the same shape as 'MigrationManager.INVESTIGATORS_ALT'.
+        """
+        cursor = self.conn.execute("SELECT pi_string, username, association FROM aliases")
+        return {
+            pi_string: {
+                "username": username,
+                "association": association
+            } for pi_string, username, association in cursor
+        }
+
+    def save_alias(self, pi_string, username, association, source):
+        """
+        Inserts or updates the alias of a PI string and commits it right away, so that aliases learned before
+        a failure are kept.
+
+        Parameters:
+        - pi_string: The PI string as it appears in the database.
+        - username: The username the PI string was resolved to.
+        - association: The association the PI string was resolved to.
+        - source: Where the alias was learned from.
+        """
+        self.save_aliases([(pi_string, username, association)], source)
+
+    def save_aliases(self, aliases, source):
+        """
+        Inserts or updates the aliases of several PI strings in a single commit.
+
+        Parameters:
+        - aliases: A list of (pi_string, username, association) tuples.
+        - source: Where the aliases were learned from.
+        """
+        if not aliases:
+            return
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        self.conn.executemany("""
+            INSERT INTO aliases (pi_string, username, association, source, learned_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(pi_string) DO UPDATE SET
+                username = excluded.username,
+                association = excluded.association,
+                source = excluded.source,
+                updated_at = excluded.updated_at
+        """, [
+            (pi_string, self._to_text(username), self._to_text(association), source, timestamp, timestamp)
+            for pi_string, username, association in aliases
+        ])
+        self.conn.commit()
+
+    @staticmethod
+    def _to_text(value):
+        # Empty cells of the feedback workbook are read as NaN
+        return value if isinstance(value, str) else None
+
+    def close(self):
+        self.conn.close()
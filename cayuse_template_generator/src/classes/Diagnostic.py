@@ -0,0 +1,27 @@
+class Diagnostic:
+    """
+    Describes why a value could not be resolved, without raising an Exception.
+    Resolvers return a Diagnostic next to the value so builders can collect them and add all the comments of a sheet at once.
+    """
+    def __init__(self, code, message, column = None, grant_id = None):
+        """
+        Parameters:
+        - code: Short identifier of the problem (e.g. 'missing_sponsor').
+        - message: The text of the comment added to the sheet.
+        - column: The 0-based index of the sheet column the comment belongs to.
+        - grant_id: The Grant_ID of the grant the value belongs to.
+        """
+        self.code = code
+        self.message = message
+        self.column = column
+        self.grant_id = grant_id
+
+    def at(self, column, grant_id = None):
+        # Resolved values are memoised without a location, so every row gets its own located copy
+        return Diagnostic(self.code, self.message, column, grant_id)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Diagnostic({self.code!r}, {self.message!r}, column={self.column!r}, grant_id={self.grant_id!r})"
@@ -0,0 +1,87 @@
+import rapidfuzz
+
+class DisciplineResolver:
+    """
+    Resolves discipline IDs and names against the 'LU_Discipline' table, which is loaded once per run.
+    Every distinct value is only resolved once and the values of a whole column are fuzzy matched in a single batch.
+    """
+    # Same threshold 'find_closest_match' uses
+    FUZZY_THRESHOLD = 80
+    ERRORS = {
+        "missing_discipline": "Grant does not have a Discipline in the database",
+        "invalid_discipline": "Grant does not have a valid Discipline in the database",
+        "invalid_discipline_id": "Grant does not have a valid Discipline ID in the database"
+    }
+
+    def __init__(self, disciplines):
+        """
+        Parameters:
+        - disciplines: Maps the ID of every discipline in 'LU_Discipline' to its name.
+        """
+        self.disciplines = disciplines
+        self.names = list(disciplines.values())
+        self.name_set = set(self.names)
+        self.cache = dict()
+
+    def by_id(self, discipline_id):
+        return self.disciplines.get(int(discipline_id))
+
+    def by_name(self, name):
+        return name if name in self.name_set else None
+
+    def _resolve_exact(self, value):
+        # Resolves the values that do not need fuzzy matching, returns None for the values that do
+        if not value:
+            return None, self.ERRORS["missing_discipline"]
+        if not isinstance(value, (int, str)):
+            return None, self.ERRORS["invalid_discipline"]
+        if isinstance(value, int) or value.isdigit():
+            discipline_name = self.by_id(value)
+            if discipline_name:
+                return discipline_name, None
+            return None, self.ERRORS["invalid_discipline_id"]
+        if value in self.name_set:
+            return value, None
+        return None
+
+    def _match_batch(self, values):
+        # Matches every value against every discipline name at once, keeping the first name with the best score
+        if not values or not self.names:
+            return dict.fromkeys(values)
+        scores = rapidfuzz.process.cdist(values, self.names, scorer=rapidfuzz.fuzz.ratio, score_cutoff=self.FUZZY_THRESHOLD)
+        best_indexes = scores.argmax(axis=1)
+        return {
+            value: (self.names[best_index] if scores[row, best_index] >= self.FUZZY_THRESHOLD else None)
+            for row, (value, best_index) in enumerate(zip(values, best_indexes))
+        }
+
+    def resolve_all(self, values):
+        """
+        Resolves a list of discipline IDs or names.
+
+        Returns:
+        - Two lists aligned with the values: the name of the resolved discipline and the reason the value
+          could not be resolved (None where it was resolved).
+        """
+        pending = []
+        for value in dict.fromkeys(values):
+            if value in self.cache:
+                continue
+            resolved = self._resolve_exact(value)
+            if resolved is None:
+                pending.append(value)
+            else:
+                self.cache[value] = resolved
+
+        for value, closest_match in self._match_batch(pending).items():
+            if closest_match:
+                self.cache[value] = (closest_match, None)
+            else:
+                self.cache[value] = (None, self.ERRORS["invalid_discipline"])
+
+        results = [self.cache[value] for value in values]
+        return [name for name, error in results], [error for name, error in results]
+
+    def resolve(self, value):
+        names, errors = self.resolve_all([value])
+        return names[0], errors[0]
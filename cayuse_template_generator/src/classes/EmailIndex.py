@@ -0,0 +1,53 @@
+import re
+from methods.utils import find_email_by_username
+
+class EmailIndex:
+    """
+    Hash map from possible last names to the emails whose local part could contain them, so that matching a
+    PI to an email only verifies the handful of emails that share the PI's last name.
+    """
+    def __init__(self, email_list):
+        """
+        Parameters:
+        - email_list: The emails to index, the order of the list is kept when resolving ties.
+        """
+        self.emails = [email for email in email_list if isinstance(email, str)]
+        self.by_last_name = dict()
+
+        for position, email in enumerate(self.emails):
+            for key in self.tokenize(email):
+                self.by_last_name.setdefault(key, set()).add(position)
+
+    @staticmethod
+    def tokenize(email):
+        """
+        Splits the local part of an email into the keys a last name could be looked up by.
+        Every substring of each part of 'first.last', 'f.last' and 'first_last' is a key, so that 'flast' and
+        'firstlast' are found by 'last', and so is any other username containing the last name, the same
+        substring matches 'find_email_by_username' finds when it scans every email. Trailing digits are ignored.
+        """
+        local_part = email.split('@', 1)[0].lower()
+        keys = set()
+        for part in re.split(r"[._]", local_part):
+            part = part.rstrip("0123456789")
+            keys.update(part[start:end] for start in range(len(part)) for end in range(start + 1, len(part) + 1))
+        return keys
+
+    def candidates(self, last_name):
+        positions = self.by_last_name.get(last_name.strip().lower(), set())
+        return [self.emails[position] for position in sorted(positions)]
+
+    def find(self, first_name, last_name):
+        """
+        Finds the email of an investigator using the same rules as 'find_email_by_username', only checking
+        the emails indexed under the investigator's last name.
+
+        Returns:
+        - The matched email or None if no email matches.
+        """
+        if not first_name or not last_name:
+            return None
+        candidate_emails = self.candidates(last_name)
+        if not candidate_emails:
+            return None
+        return find_email_by_username(first_name.strip(), last_name.strip(), candidate_emails)
@@ -0,0 +1,91 @@
+import pandas as pd
+import rapidfuzz
+
+class InstrumentTypeResolver:
+    """
+    Classifies the 'Award Type' of grants into instrument types using a precomputed letter map and a single
+    fuzzy matcher over the titles of every instrument type, memoising the result of every distinct 'Award Type'.
+    """
+    # Same threshold 'find_closest_match' used when the titles of each type were matched one type at a time
+    TITLE_THRESHOLD = 80
+    PSC_CUNY_TYPE = "PSC CUNY"
+
+    def __init__(self, type_names, type_letters, type_titles, award_types = None):
+        """
+        Parameters:
+        - type_names: The instrument types in the order they take precedence.
+        - type_letters: Maps every award type letter to its instrument type.
+        - type_titles: List of (title, instrument type) pairs.
+        - award_types: Maps the IDs of the 'LU_AType' table to their 'Letter-Title' names, used for grants whose 'Award Type' holds an ID.
+        """
+        self.type_positions = {type_name: position for position, type_name in enumerate(type_names)}
+        self.type_names = list(type_names)
+        self.type_letters = type_letters
+        self.titles = [title.lower() for title, type_name in type_titles]
+        self.title_positions = [self.type_positions[type_name] for title, type_name in type_titles]
+        self.award_types = {str(type_id): name for type_id, name in (award_types or dict()).items()}
+        self.cache = dict()
+
+    def _match(self, award_type):
+        if award_type.isnumeric() and award_type in self.award_types:
+            award_type = self.award_types[award_type]
+        type_letter, type_title = award_type.split('-')
+
+        # The first instrument type (in order) whose letter or titles match wins
+        candidates = []
+        if type_letter in self.type_letters:
+            candidates.append(self.type_positions[self.type_letters[type_letter]])
+        title_matches = rapidfuzz.process.extract(type_title.lower(), self.titles, scorer=rapidfuzz.fuzz.ratio, score_cutoff=self.TITLE_THRESHOLD, limit=None)
+        candidates.extend(self.title_positions[index] for title, score, index in title_matches)
+        return self.type_names[min(candidates)] if candidates else None
+
+    def match(self, award_type):
+        """
+        Returns:
+        - The instrument type of an 'Award Type' value or None if no type matches. Raises an Exception if the value is not in the 'Letter-Title' format.
+        """
+        if award_type not in self.cache:
+            try:
+                self.cache[award_type] = (self._match(award_type), None)
+            except Exception as e:
+                self.cache[award_type] = (None, e)
+        instrument_type, error = self.cache[award_type]
+        if error:
+            raise error
+        return instrument_type
+
+    def determine(self, award_type, grant_id):
+        if award_type:
+            instrument_type = self.match(award_type)
+            if instrument_type:
+                return instrument_type
+        if str(grant_id).startswith('6'):
+            return self.PSC_CUNY_TYPE
+
+    def classify(self, award_types, grant_ids):
+        """
+        Classifies every grant in one pass, matching each distinct 'Award Type' once.
+
+        Parameters:
+        - award_types: Series with the 'Award Type' of every grant.
+        - grant_ids: Series with the Grant_ID of every grant, aligned with award_types.
+
+        Returns:
+        - A tuple of two Series aligned with award_types: the instrument type of every grant and the error message
+          of the grants whose 'Award Type' could not be parsed (None where there was no error).
+        """
+        instrument_types = dict()
+        for award_type in award_types.dropna().unique():
+            if award_type:
+                try:
+                    instrument_types[award_type] = (self.match(award_type), None)
+                except Exception as e:
+                    instrument_types[award_type] = (None, str(e))
+        resolved = award_types.map(lambda award_type: instrument_types.get(award_type, (None, None)))
+        types = pd.Series([instrument_type for instrument_type, error in resolved], index=award_types.index, dtype=object)
+        errors = pd.Series([error for instrument_type, error in resolved], index=award_types.index, dtype=object)
+
+        # Grants without a matching type fall back to PSC CUNY when their Grant_ID starts with a 6
+        is_psc_cuny = types.isna() & errors.isna() & grant_ids.astype(str).str.startswith('6').to_numpy()
+        types[is_psc_cuny] = self.PSC_CUNY_TYPE
+        return types, errors
@@ -0,0 +1,147 @@
+import rapidfuzz
+
+from classes.Diagnostic import Diagnostic
+
+class InvestigatorIndex:
+    """
+    Lookup tables over the investigators loaded from the feedback workbook, built once so that every
+    PI string of a grant can be resolved without scanning the whole investigator list.
+    """
+    # Minimum rapidfuzz ratio for a near-miss spelling of the first name to be accepted
+    FUZZY_THRESHOLD = 85
+    # Minimum Jaro-Winkler similarity for a misspelled last name, high enough to accept transposed or missing letters ('Smtih') but not other names ('Smithson')
+    LAST_NAME_THRESHOLD = 93
+    # Number of leading letters of the last name that candidates are blocked by
+    BLOCK_PREFIX_LENGTH = 2
+
+    def __init__(self, investigators, aliases = None):
+        """
+        Parameters:
+        - investigators: The investigators keyed by employee id, as built by 'MigrationManager.retrieve_PI_Info'.
+        - aliases: The dictionary of learned PI strings, updated in place whenever an alias is added.
+        """
+        self.investigators = investigators
+        self.aliases = aliases if aliases is not None else dict()
+        self.by_name = dict()
+        self.by_email = dict()
+        self.by_alias = dict()
+        self.by_last_name = dict()
+        self.by_block = dict()
+        self.fuzzy_cache = dict()
+
+        for empl_id, props in investigators.items():
+            name_key = self.normalize_name(f"{props['name']['last']}, {props['name']['first']}")
+            # Later investigators take precedence, same as the reverse lookup this index replaces
+            self.by_name[name_key] = empl_id
+            if isinstance(props.get('email'), str):
+                self.by_email[props['email'].strip().lower()] = empl_id
+            last_name, first_name = self.split_name(name_key)
+            if last_name not in self.by_last_name:
+                self.by_block.setdefault(self.block_key(last_name), list()).append(last_name)
+            self.by_last_name.setdefault(last_name, dict())[first_name] = empl_id
+
+        for pi_string, alias_info in self.aliases.items():
+            self.by_alias[self.normalize_name(pi_string)] = alias_info
+
+    @staticmethod
+    def normalize_name(name):
+        """
+        Normalizes a 'Last, First' name so that casing, extra whitespace and the spacing around the comma are ignored.
+        """
+        if not isinstance(name, str):
+            return None
+        parts = [" ".join(part.split()) for part in name.lower().split(',', 1)]
+        return ", ".join(parts)
+
+    @staticmethod
+    def split_name(name_key):
+        # Splits a normalized name into its last and first name, names without a comma only have a last name
+        last_name, _, first_name = name_key.partition(', ')
+        return last_name, first_name
+
+    @classmethod
+    def block_key(cls, last_name):
+        return last_name[:cls.BLOCK_PREFIX_LENGTH]
+
+    def get_by_employee_id(self, empl_id):
+        return self.investigators.get(str(empl_id))
+
+    def get_by_email(self, email):
+        if not isinstance(email, str):
+            return None
+        empl_id = self.by_email.get(email.strip().lower())
+        return self.investigators[empl_id] if empl_id is not None else None
+
+    def get_by_name(self, name):
+        empl_id = self.by_name.get(self.normalize_name(name))
+        return self.investigators[empl_id] if empl_id is not None else None
+
+    def get_alias(self, pi_string):
+        return self.by_alias.get(self.normalize_name(pi_string))
+
+    def add_alias(self, pi_string, username, association):
+        """
+        Records the username and association a PI string was resolved to, unless the PI string is already known.
+
+        Returns:
+        - True if the alias was learned, False if the PI string was already known.
+        """
+        if pi_string in self.aliases:
+            return False
+        alias_info = {
+            "username": username,
+            "association": association
+        }
+        self.aliases[pi_string] = alias_info
+        self.by_alias.setdefault(self.normalize_name(pi_string), alias_info)
+        return True
+
+    def get_by_fuzzy_name(self, name):
+        """
+        Finds the investigator whose name is closest to a misspelled PI string.
+        Only the last names sharing the first letters of the PI string's last name are compared. Both the last and the first name
+        must be close on their own, so that a similar name never resolves to a different person, e.g. 'Smith, Joan' for 'Smith, John'.
+        The closest last name wins, so an exact last name is always preferred.
+        """
+        name_key = self.normalize_name(name)
+        if not name_key:
+            return None
+        if name_key not in self.fuzzy_cache:
+            last_name, first_name = self.split_name(name_key)
+            best_match, best_scores = None, None
+            for candidate_last_name in (self.by_block.get(self.block_key(last_name), list()) if first_name else list()):
+                last_score = rapidfuzz.distance.JaroWinkler.normalized_similarity(last_name, candidate_last_name) * 100
+                if last_score < self.LAST_NAME_THRESHOLD:
+                    continue
+                candidates = self.by_last_name[candidate_last_name]
+                match = rapidfuzz.process.extractOne(first_name, list(candidates), scorer=rapidfuzz.fuzz.ratio, score_cutoff=self.FUZZY_THRESHOLD)
+                if match and (best_scores is None or (last_score, match[1]) > best_scores):
+                    best_match, best_scores = candidates[match[0]], (last_score, match[1])
+            self.fuzzy_cache[name_key] = best_match
+        empl_id = self.fuzzy_cache[name_key]
+        return self.investigators[empl_id] if empl_id is not None else None
+
+    def resolve(self, pi_string):
+        """
+        Resolves a PI string by exact name first, then by learned alias and finally by fuzzy first name.
+
+        Returns:
+        - A tuple with the (username, association) of the investigator, or None if the PI string could not be resolved,
+          and a Diagnostic when the investigator was only found by a fuzzy match and should be verified.
+        """
+        investigator_info = self.get_by_name(pi_string)
+        if investigator_info != None:
+            return (investigator_info['email'], investigator_info.get('association')), None
+
+        alias_info = self.get_alias(pi_string)
+        if alias_info != None:
+            return (alias_info['username'], alias_info['association']), None
+
+        investigator_info = self.get_by_fuzzy_name(pi_string)
+        if investigator_info != None:
+            matched_name = f"{investigator_info['name']['last']}, {investigator_info['name']['first']}"
+            return (investigator_info['email'], investigator_info.get('association')), Diagnostic(
+                "fuzzy_investigator",
+                f"Primary_PI '{pi_string}' was matched to the similarly named investigator '{matched_name}', verify the username."
+            )
+        return None, None
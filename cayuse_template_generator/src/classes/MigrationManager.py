@@ -2,19 +2,25 @@ import multiprocessing
 from math import ceil
 import pandas as pd
 import math
-import json
-import re
 from dotenv import load_dotenv
-from methods.utils import find_email_by_username
+from methods.budget_periods import compute_budget_periods
+from methods.investigators import build_investigator_table, investigator_table_to_dict
+from methods.config_bundle import load_config
 # Load environment variables from .env file
 load_dotenv("../env/.env.development")
 
 import os
 
 from classes.DatabaseManager import DatabaseManager
+from classes.AliasStore import AliasStore
+from classes.InvestigatorIndex import InvestigatorIndex
+from classes.EmailIndex import EmailIndex
+from classes.InstrumentTypeResolver import InstrumentTypeResolver
+from classes.AdminUnitResolver import AdminUnitResolver
+from classes.DisciplineResolver import DisciplineResolver
 from classes.TemplateManager.TemplateManager import TemplateManager
 
-from sheets.proposals import proposals_sheet_append
+from sheets.proposals import proposals_sheet_append, proposals_sheet_build
 from sheets.members import members_sheet_append
 from sheets.projects import projects_sheet_append
 from sheets.awards import awards_sheet_append
@@ -27,10 +33,10 @@ class MigrationManager:
         # Initialize an instance of the TemplateManager class for the feedback file
         self.feedback_template_manager = TemplateManager(os.getenv('EXCEL_FILE_PATH'), os.path.join(os.getenv('SAVE_PATH'), 'cayuse_template_data_logs.json'))
 
-        # Open the JSON file that contains the data regarding the sheets to be created
-        with open('./config/gen_sheets.json') as f:
-            # Load the JSON data into a dictionary
-            gen_sheets = json.load(f)
+        # Load the compiled configuration bundle, which is recompiled whenever one of its JSON files changes
+        self.CONFIG = load_config()
+        # The columns of the sheets to be created
+        gen_sheets = self.CONFIG['indexes']['sheet_columns']
             
         # Initialize an instance of the TemplateManager class for the generated data
         self.generated_template_manager = TemplateManager(log_file_path=(os.path.join(os.getenv("SAVE_PATH"), 'cayuse_generated_template_data_logs.json')), create_sheets=({sheet: {col:[] for col in sheet_props} for sheet,sheet_props in gen_sheets.items()}))
@@ -39,129 +45,128 @@ class MigrationManager:
         self.db_manager = DatabaseManager(os.path.join(os.getenv('SAVE_PATH'), 'cayuse_database_data_logs.json'))
         # Initialize the connection to the database
         self.db_manager.init_db_conn(os.getenv('ACCESS_DB_PATH'))
+        
+        # Initialize the store of the PI aliases learned during previous runs
+        self.alias_store = AliasStore(os.path.join(os.getenv('SAVE_PATH'), 'cayuse_investigator_aliases.db'))
 
     def __enter__(self):
-        self.retrieve_PI_Info()
-        self.retrieve_ORG_Info()
-        self.retrieve_Disciplines()
-        self.retrieve_Instrument_Types()
+        try:
+            self.retrieve_PI_Info()
+            self.retrieve_PI_Aliases()
+            self.retrieve_ORG_Info()
+            self.retrieve_Disciplines()
+            self.retrieve_Instrument_Types()
+        except Exception:
+            # __exit__ is not called when __enter__ fails
+            self.alias_store.close()
+            raise
                     
         return self
     
     def __exit__(self, exc_type, exc_value, traceback):     
-        generated_data = dict()
-        for sheet_name, sheet_props in self.feedback_template_manager.df.items():
-            generated_data[sheet_name] = sheet_props.to_dict()
-        self.generated_template_manager.save_changes(os.path.join(os.getenv('SAVE_PATH'), 'generated_data.xlsx'))
+        try:
+            generated_data = dict()
+            for sheet_name, sheet_props in self.feedback_template_manager.df.items():
+                generated_data[sheet_name] = sheet_props.to_dict()
+            self.generated_template_manager.save_changes(os.path.join(os.getenv('SAVE_PATH'), 'generated_data.xlsx'))
+        finally:
+            self.alias_store.close()
         
     def retrieve_PI_Info(self):
-        investigators = {}
-        pi_fragments = {}
-        people_dataframe = self.feedback_template_manager.df["Data - People"]
-        people_sheet_length, people_sheet_width = people_dataframe.shape
-        people_rows = people_dataframe.iloc[1:people_sheet_length - 1]
-        for index, person in people_rows.iterrows():
-            first_name = person[0].strip().capitalize()
-            middle_name = (person[1] if isinstance(person[1], str) else "").strip().capitalize()
-            last_name = person[2].strip().capitalize()
-            email = person[4]
-            empl_id = None
-            
-            enclosed_regex = r".*\(\d{8}\)$"
-            if re.match(enclosed_regex, last_name):
-                last_name, empl_id = last_name.split("(")
-                empl_id = str(empl_id[:-1])
-            else:
-                empl_id = str(person[3])
-            
-            if not empl_id in investigators:
-                investigators[empl_id] = {
-                    "name": {
-                        "first": first_name,
-                        "middle": middle_name,
-                        "last": last_name
-                    },
-                    "email": email
-                }
-            else:
-                raise Exception("Duplicate investigator in 'Data - People' sheet")
-            
-        association_dataframe = self.feedback_template_manager.df["Data - Associations"]
-        for index, associate in association_dataframe.iterrows():
-            pi_empl_id = str(associate["EMP ID"])
-            if pi_empl_id:
-                pi_association = associate["ASSOCIATION"]
-                if pi_association:
-                    if pi_empl_id in investigators:
-                        investigators[pi_empl_id]["association"] = pi_association
-                    else:
-                       pi_fragments[pi_empl_id] = {
-                           "email": associate["USERNAME"],
-                           "association": pi_association
-                       }
-                else:
-                    raise Exception("Investigator is missing Association in 'Data - Associations' sheet")
-            else:
-                raise Exception("Investigator is missing Employee ID in 'Data - Associations' sheet")
-            
-        # Missing: Logic that fills in missing information for investigators in 'Data - Association' sheet
-        # # Retrieve Primary Investigator Information
-        # template_pull = self.feedback_template_manager.df["Data - Associations"][['USERNAME','ASSOCIATION']]
-        # pi_info = dict()
-        # for index, row in template_pull.iterrows():
-        #     pi_info[row['USERNAME']] = row['ASSOCIATION']
-        # pi_emails = [str(email) for email in pi_info.keys()]
-        # res = self.db_manager.execute_query("SELECT PI_name FROM PI_name")
-        # pi_names = set(pi['PI_name'] for pi in res)
-        
-        # for pi in pi_names:
-        #     if pi:
-        #         try:
-        #             if ',' in pi:
-        #                 l_name, f_name = pi.split(", ")
-        #             else:
-        #                 l_name, f_name = pi.rsplit(' ')
-        #         except ValueError:
-        #             continue
-        #         closest_match = find_email_by_username(f_name, l_name, pi_emails)
-        #         if closest_match:
-        #             self.pi_data[f"{l_name}, {f_name}"] = {
-        #                 "email": closest_match,
-        #                 "association": pi_info[closest_match]
-        #             }
+        # Build the investigators table from the people and associations sheets, only duplicate investigators stop the migration
+        investigator_table, problems = build_investigator_table(self.feedback_template_manager.df["Data - People"], self.feedback_template_manager.df["Data - Associations"])
+        for problem in problems:
+            print(f"Skipped while retrieving investigators: {problem}")
         
+        investigators = investigator_table_to_dict(investigator_table)
+        self.INVESTIGATOR_TABLE = investigator_table
         self.INVESTIGATORS = investigators
+        # Load the aliases learned during previous runs before indexing them
+        self.INVESTIGATORS_ALT.update(self.alias_store.load())
+        # Index the investigators once so that every PI string can be resolved without scanning them again
+        self.INVESTIGATOR_INDEX = InvestigatorIndex(investigators, self.INVESTIGATORS_ALT)
+        
+    def retrieve_PI_Aliases(self):
+        # Match every distinct PI name in the database to the username of the 'Data - Associations' sheet that shares its last name
+        template_pull = self.feedback_template_manager.df["Data - Associations"][['USERNAME','ASSOCIATION']]
+        has_username = template_pull['USERNAME'].map(lambda username: isinstance(username, str))
+        pi_info = dict(zip(template_pull.loc[has_username, 'USERNAME'], template_pull.loc[has_username, 'ASSOCIATION']))
+        email_index = EmailIndex(list(pi_info.keys()))
+        
+        res = self.db_manager.execute_query("SELECT PI_name FROM PI_name")
+        pi_names = sorted(set(pi['PI_name'] for pi in res if pi['PI_name']))
+        learned_aliases = list()
+        for pi in pi_names:
+            if pi:
+                try:
+                    if ',' in pi:
+                        l_name, f_name = pi.split(", ")
+                    else:
+                        f_name, l_name = pi.rsplit(' ', 1)
+                except ValueError:
+                    continue
+                pi_string = f"{l_name}, {f_name}"
+                # Aliases learned during previous runs are loaded from the alias store and not matched again
+                if self.INVESTIGATOR_INDEX.get_alias(pi_string) != None:
+                    continue
+                closest_match = email_index.find(f_name, l_name)
+                if closest_match and self.INVESTIGATOR_INDEX.add_alias(pi_string, closest_match, pi_info[closest_match]):
+                    learned_aliases.append((pi_string, closest_match, pi_info[closest_match]))
+        self.alias_store.save_aliases(learned_aliases, "association username")
         
     def retrieve_ORG_Info(self):
         # Retrieve Organization related Information
-        with open('./config/john_jay_org_units.json') as f:
-            self.ORG_UNITS = json.load(f)
-        with open('./config/john_jay_centers.json') as f:
-            self.ORG_CENTERS = json.load(f)
-        with open('./config/john_jay_external_orgs.json') as f:
-            self.ORGANIZATIONS = json.load(f)
+        self.ORG_UNITS = self.CONFIG['data']['org_units']
+        self.ORG_CENTERS = self.CONFIG['data']['org_centers']
+        self.ORGANIZATIONS = self.CONFIG['data']['external_orgs']
+        self.ADMIN_UNIT_RESOLVER = AdminUnitResolver(
+            self.CONFIG['indexes']['admin_unit_codes'],
+            self.CONFIG['indexes']['admin_center_units']
+        )
         
     def retrieve_Disciplines(self):
         select_query = self.db_manager.execute_query("SELECT * FROM LU_Discipline")
         self.DISCIPLINES = {int(item['ID']):item['Name'] for item in select_query}
+        self.DISCIPLINE_RESOLVER = DisciplineResolver(self.DISCIPLINES)
         
     def retrieve_Instrument_Types(self):
-        relevant_data = None
-        with open('./config/john_jay_instrument_and_activity_types.json') as f:
-            relevant_data = json.load(f)
+        relevant_data = self.CONFIG['data']['instrument_and_activity_types']
             
         self.INSTRUMENT_TYPES = relevant_data["instrument_types"]
         self.ACTIVITY_TYPES = relevant_data['activity_types']
+        
+        # Some grants hold the ID of their award type instead of its 'Letter-Title' name
+        select_query = self.db_manager.execute_query("SELECT ID, Field1 FROM LU_AType")
+        self.AWARD_TYPES = {int(item['ID']):item['Field1'] for item in select_query}
+        self.INSTRUMENT_TYPE_RESOLVER = InstrumentTypeResolver(
+            self.INSTRUMENT_TYPES.keys(),
+            self.CONFIG['indexes']['instrument_type_letters'],
+            self.CONFIG['indexes']['instrument_type_titles'],
+            self.AWARD_TYPES
+        )
+
+    def retrieve_Budget_Periods(self, grants):
+        # Pivot the funds of every grant by budget period in a single pass
+        self.BUDGET_PERIODS = compute_budget_periods(
+            [grant['grant_data']['Grant_ID'] for grant in grants],
+            [fund for grant in grants for fund in grant['total_data']],
+            [fund for grant in grants for fund in grant['rifunds_data']],
+            [fund for grant in grants for fund in grant['ffunds_data']],
+            [fund for grant in grants for fund in grant['fifunds_data']]
+        )
 
     def start_migration(self, grants):
+        self.retrieve_Budget_Periods(grants)
         # self.projects_sheet_append(grants)
         # self.proposals_sheet_append(grants)
+        # self.proposals_sheet_build(grants)
         # self.members_sheet_append(grants)
         # self.awards_sheet_append(grants)
         self.attachments_sheet_append(grants)
             
 MigrationManager.projects_sheet_append = projects_sheet_append
 MigrationManager.proposals_sheet_append = proposals_sheet_append
+MigrationManager.proposals_sheet_build = proposals_sheet_build
 MigrationManager.members_sheet_append = members_sheet_append
 MigrationManager.awards_sheet_append = awards_sheet_append
 MigrationManager.attachments_sheet_append = attachments_sheet_append
\ No newline at end of file
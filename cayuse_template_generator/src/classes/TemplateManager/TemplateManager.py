@@ -1,6 +1,7 @@
 import os
 import openpyxl.workbook
 import pandas as pd
+import numpy as np
 import openpyxl
 
 from classes.LogManager.TemplateLogManager import TemplateLogManager
@@ -51,6 +52,64 @@ class TemplateManager:
         # Append using pd.concat
         self.df[sheet_name] = pd.concat([self.df[sheet_name], new_row], ignore_index=True)
 
+    @staticmethod
+    def normalize_legacy_key(value):
+        """
+        Converts a legacy number into a hashable key that compares equal regardless of its source.
+        Excel returns numeric legacy numbers as floats (90053.0) while Access returns them as ints (90053),
+        so both are reduced to the same string representation.
+
+        Parameters:
+        - value: The legacy number read from a sheet or from the database.
+
+        Returns:
+        - The normalized key, or None if the value is missing.
+        """
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        if isinstance(value, (int, np.integer)):
+            return str(int(value))
+        if isinstance(value, (float, np.floating)):
+            return str(int(value)) if float(value).is_integer() else str(value)
+        value = str(value).strip()
+        if not value:
+            return None
+        # Strings such as "90053.0" are produced when a numeric column was stored as text
+        if value.endswith(".0") and value[:-2].isdigit():
+            return value[:-2]
+        return value
+
+    def legacy_key_set(self, sheet_name: str, identifier: str) -> set:
+        """
+        Retrieve the normalized legacy numbers stored in a column of a sheet.
+
+        Parameters:
+        - sheet_name: Name of the sheet to read from.
+        - identifier: Column name holding the legacy numbers.
+
+        Raises:
+        - KeyError: If the sheet or column does not exist.
+        """
+        try:
+            column = self.df[sheet_name][identifier].dropna()
+        except KeyError as e:
+            raise KeyError(f"{str(e)} not found in the workbook.")
+        keys = set(column.map(self.normalize_legacy_key))
+        keys.discard(None)
+        return keys
+
+    def filter_new(self, ids, sheet_name: str, identifier: str) -> list:
+        """
+        Retrieve the ids that do not already exist in a column of a sheet, preserving their order.
+
+        Parameters:
+        - ids: Legacy numbers to filter (e.g. the Grant_IDs returned by the database).
+        - sheet_name: Name of the sheet holding the existing legacy numbers.
+        - identifier: Column name holding the existing legacy numbers.
+        """
+        existing_keys = self.legacy_key_set(sheet_name, identifier)
+        return [id for id in ids if self.normalize_legacy_key(id) not in existing_keys]
+
     def get_entry(self, sheet_name: str, identifier: str, value: any, all: bool = False):
         """
         Retrieve rows from a specified sheet based on a column's value.
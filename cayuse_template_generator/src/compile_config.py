@@ -0,0 +1,6 @@
+from methods.config_bundle import compile_config, CONFIG_BUNDLE_PATH
+
+# Compile the JSON configuration files into the bundle loaded by the MigrationManager
+if __name__ == "__main__":
+    bundle = compile_config()
+    print(f"Compiled {len(bundle['sources'])} configuration files into '{CONFIG_BUNDLE_PATH}'")
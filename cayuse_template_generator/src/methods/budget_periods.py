@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+MAX_BUDGET_PERIODS = 10
+
+# Maps every budget kind to the (grant id, grant year, amount) columns of the table it is read from
+BUDGET_TABLES = {
+    "total": ("RFunds_Grant_ID", "RGrant_Year", "RAmount"),              # total
+    "indirect": ("RIFunds_Grant_ID", "RIGrant_Year", "RIAmount"),        # RIfunds
+    "awarded_total": ("FFunds_Grant_ID", "FGrant_Year", "FAmount"),      # Ffunds
+    "awarded_indirect": ("FIFunds_Grant_ID", "FIGrant_Year", "FIAmount") # FIFunds
+}
+
+def _find_year_column(frame, year_col):
+    if year_col in frame:
+        return year_col
+    # Fall back to any column that follows the '<prefix>Grant_Year' naming used by the funds tables
+    return next((col for col in frame.columns if str(col).lower().endswith("grant_year")), None)
+
+def _pivot_budget_table(rows, grant_ids, id_col, year_col, amount_col):
+    """
+    Pivots the rows of a funds table into one row per grant and one column per budget period.
+    Budget periods are numbered by the rank of the grant year within each grant, so the earliest
+    year becomes period 1. Rows without a usable year are treated as year 0, the same way the
+    previous per-grant 'min(..., key=safe_convert)' lookup treated them. A table without any year
+    column has all of its funds summed into the first period.
+
+    Returns:
+    - A tuple with the yearly amounts of the first MAX_BUDGET_PERIODS periods, the total amount and the number of distinct years of every grant.
+    """
+    frame = pd.DataFrame(rows)
+    grant_index = pd.Index(grant_ids)
+    period_columns = range(1, MAX_BUDGET_PERIODS + 1)
+    if frame.empty or id_col not in frame:
+        return pd.DataFrame(np.nan, index=grant_index, columns=period_columns), pd.Series(0.0, index=grant_index), pd.Series(0, index=grant_index)
+
+    amounts = pd.to_numeric(frame[amount_col], errors='coerce').fillna(0)
+    year_col = _find_year_column(frame, year_col)
+    years = pd.to_numeric(frame[year_col], errors='coerce').fillna(0) if year_col else pd.Series(0, index=frame.index)
+    period_numbers = years.groupby(frame[id_col]).rank(method='dense').astype(int)
+
+    totals = amounts.groupby(frame[id_col]).sum().reindex(grant_index, fill_value=0)
+    period_counts = period_numbers.groupby(frame[id_col]).max().reindex(grant_index, fill_value=0)
+    yearly = amounts.groupby([frame[id_col], period_numbers]).sum().unstack()
+    return yearly.reindex(index=grant_index, columns=period_columns), totals, period_counts
+
+def compute_budget_periods(grant_ids, total_rows, rifunds_rows, ffunds_rows, fifunds_rows):
+    """
+    Computes the yearly and total budget of every grant in a single grouped pass over the funds tables.
+
+    Parameters:
+    - grant_ids: The Grant_IDs of the grants whose budgets will be computed.
+    - total_rows, rifunds_rows, ffunds_rows, fifunds_rows: The rows of the total, RIfunds, Ffunds and FIFunds tables.
+
+    Returns:
+    - A DataFrame indexed by Grant_ID with the columns 'periods', 'total', 'indirect', 'direct',
+      'awarded_total', 'awarded_indirect', 'awarded_direct' and their yearly counterparts
+      ('total_1' ... 'awarded_direct_10'). Years without any funds are left empty, with the exception
+      of the first year which defaults to 0. 'periods' is the number of distinct years in the total table and
+      'extra_periods' the number of budget periods of any table beyond MAX_BUDGET_PERIODS, which have no yearly columns.
+    """
+    grant_ids = list(dict.fromkeys(grant_ids))
+    budget = pd.DataFrame(index=pd.Index(grant_ids, name="Grant_ID"))
+
+    budget['periods'] = 0
+    budget['extra_periods'] = 0
+    for kind, rows in zip(BUDGET_TABLES, [total_rows, rifunds_rows, ffunds_rows, fifunds_rows]):
+        yearly, totals, period_counts = _pivot_budget_table(rows, grant_ids, *BUDGET_TABLES[kind])
+        if kind == "total":
+            budget['periods'] = period_counts.to_numpy()
+        budget['extra_periods'] = np.maximum(budget['extra_periods'].to_numpy(), (period_counts - MAX_BUDGET_PERIODS).clip(lower=0).to_numpy())
+        yearly = yearly.round()
+        yearly[1] = yearly[1].fillna(0)
+        budget[kind] = totals.round().to_numpy()
+        for year in yearly.columns:
+            budget[f"{kind}_{year}"] = yearly[year].to_numpy()
+
+    # The direct costs are whatever remains of the total after the indirect costs are removed
+    for prefix in ["", "awarded_"]:
+        budget[f"{prefix}direct"] = budget[f"{prefix}total"] - budget[f"{prefix}indirect"]
+        for year in range(1, MAX_BUDGET_PERIODS + 1):
+            year_total = budget[f"{prefix}total_{year}"]
+            year_indirect = budget[f"{prefix}indirect_{year}"]
+            budget[f"{prefix}direct_{year}"] = (year_total.fillna(0) - year_indirect.fillna(0)).where(year_total.notna() | year_indirect.notna())
+
+    return budget.astype('Int64')
@@ -0,0 +1,103 @@
+import json
+import os
+import pickle
+
+# Bump whenever the layout of the bundle or of its derived indexes changes
+CONFIG_BUNDLE_VERSION = 2
+CONFIG_DIR = './config'
+CONFIG_BUNDLE_PATH = os.path.join(CONFIG_DIR, 'compiled_config.pickle')
+
+# Maps the key of every source in the bundle to the JSON file it is compiled from
+CONFIG_SOURCES = {
+    "external_orgs": "john_jay_external_orgs.json",
+    "org_units": "john_jay_org_units.json",
+    "org_centers": "john_jay_centers.json",
+    "instrument_and_activity_types": "john_jay_instrument_and_activity_types.json",
+    "gen_sheets": "gen_sheets.json"
+}
+
+def _source_signature(config_dir):
+    # The modification time and size of every source, used to detect when the bundle is stale
+    signature = dict()
+    for file_name in CONFIG_SOURCES.values():
+        stat = os.stat(os.path.join(config_dir, file_name))
+        signature[file_name] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+def _build_indexes(data):
+    all_orgs = {
+        **data["external_orgs"]['existing_external_orgs'],
+        **data["external_orgs"]['non_existing_external_orgs']
+    }
+    inverse_orgs = {props.get('Alt Name'): name for name, props in all_orgs.items() if props.get('Alt Name')}
+
+    instrument_types = data["instrument_and_activity_types"]["instrument_types"]
+    instrument_type_letters = dict()
+    instrument_type_titles = []
+    for type_name, association in instrument_types.items():
+        for type_letter, type_title in association.items():
+            # The first instrument type listing a letter wins, same as the order the types were checked in
+            instrument_type_letters.setdefault(type_letter, type_name)
+            instrument_type_titles.append((str(type_title), type_name))
+
+    return {
+        "all_orgs": all_orgs,
+        "inverse_orgs": inverse_orgs,
+        "org_primary_names": list(all_orgs.keys()),
+        "org_primary_names_lower": [name.lower() for name in all_orgs.keys()],
+        "org_alt_names": list(inverse_orgs.keys()),
+        "org_alt_names_lower": [name.lower() for name in inverse_orgs.keys()],
+        "admin_unit_codes": {name: unit['Primary Code'] for name, unit in data["org_units"].items()},
+        "admin_center_units": {name: (center['Admin Unit'], center['Admin Unit Code']) for name, center in data["org_centers"].items()},
+        "instrument_type_letters": instrument_type_letters,
+        "instrument_type_titles": instrument_type_titles,
+        "sheet_columns": {sheet: list(columns) for sheet, columns in data["gen_sheets"].items()}
+    }
+
+def compile_config(config_dir = CONFIG_DIR, bundle_path = CONFIG_BUNDLE_PATH):
+    """
+    Compiles the JSON configuration files into a single bundle holding the raw data and every index derived from it.
+
+    Parameters:
+    - config_dir: The directory holding the JSON configuration files.
+    - bundle_path: The path the bundle is written to.
+
+    Returns:
+    - The compiled bundle.
+    """
+    signature = _source_signature(config_dir)
+    data = dict()
+    for key, file_name in CONFIG_SOURCES.items():
+        with open(os.path.join(config_dir, file_name)) as f:
+            data[key] = json.load(f)
+
+    bundle = {
+        "version": CONFIG_BUNDLE_VERSION,
+        "sources": signature,
+        "data": data,
+        "indexes": _build_indexes(data)
+    }
+
+    # Write to a temporary file first so that an interrupted compile never leaves a truncated bundle behind
+    temp_path = f"{bundle_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, bundle_path)
+    return bundle
+
+def load_config(config_dir = CONFIG_DIR, bundle_path = CONFIG_BUNDLE_PATH):
+    """
+    Loads the compiled configuration bundle, recompiling it first if it is missing, was compiled by
+    another version or any of its JSON sources changed since it was compiled.
+
+    Returns:
+    - The configuration bundle with the keys 'version', 'sources', 'data' and 'indexes'.
+    """
+    try:
+        with open(bundle_path, 'rb') as f:
+            bundle = pickle.load(f)
+        if bundle.get("version") == CONFIG_BUNDLE_VERSION and bundle.get("sources") == _source_signature(config_dir):
+            return bundle
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    return compile_config(config_dir, bundle_path)
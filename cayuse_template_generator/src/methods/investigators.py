@@ -0,0 +1,93 @@
+import pandas as pd
+
+# Matches a last name that encloses the 8 digit employee id of the investigator, e.g. 'Smith (12345678)'
+ENCLOSED_EMPL_ID_REGEX = r"^(.*)\((\d{8})\)$"
+
+def _normalize_id_column(column):
+    # Employee ids read as floats ('12345678.0') are turned back into their string form
+    ids = column.astype("string").str.strip().str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    return ids.mask(ids == "")
+
+def _normalize_name_column(column):
+    return column.where(column.map(type) == str, "").astype(str).str.strip().str.capitalize()
+
+def _sheet_rows(index):
+    # The header is the first row of the sheet, so the first row of the DataFrame is row 2
+    return ', '.join(str(label + 2) for label in index)
+
+def build_investigator_table(people_dataframe, association_dataframe):
+    """
+    Builds the table of investigators from the 'Data - People' and 'Data - Associations' sheets using column operations.
+
+    Parameters:
+    - people_dataframe: The 'Data - People' sheet, whose first and last rows are not investigators.
+    - association_dataframe: The 'Data - Associations' sheet.
+
+    Returns:
+    - A tuple with a DataFrame indexed by employee id with the columns 'first', 'middle', 'last', 'email'
+      and 'association', and a list of the problems found in the two sheets. The rows with a problem are left out of the table.
+
+    Raises:
+    - Exception: If the same Employee ID belongs to more than one investigator, listing every problem found in the two sheets.
+    """
+    problems = []
+    people_rows = people_dataframe.iloc[1:people_dataframe.shape[0] - 1]
+
+    investigators = pd.DataFrame({
+        "first": _normalize_name_column(people_rows.iloc[:, 0]),
+        "middle": _normalize_name_column(people_rows.iloc[:, 1]),
+        "last": _normalize_name_column(people_rows.iloc[:, 2]),
+        "empl_id": _normalize_id_column(people_rows.iloc[:, 3]),
+        "email": people_rows.iloc[:, 4]
+    })
+
+    # Some last names enclose the employee id, which then takes precedence over the employee id column
+    enclosed = investigators["last"].str.extract(ENCLOSED_EMPL_ID_REGEX)
+    has_enclosed_id = enclosed[1].notna()
+    investigators.loc[has_enclosed_id, "last"] = enclosed.loc[has_enclosed_id, 0].str.strip()
+    investigators.loc[has_enclosed_id, "empl_id"] = enclosed.loc[has_enclosed_id, 1]
+
+    missing_ids = investigators["empl_id"].isna()
+    if missing_ids.any():
+        problems.append(f"{missing_ids.sum()} investigator(s) are missing an Employee ID in 'Data - People' sheet (rows {_sheet_rows(investigators.index[missing_ids])})")
+    duplicates = investigators["empl_id"].duplicated(keep=False) & ~missing_ids
+    if duplicates.any():
+        problems.append(f"Duplicate investigator in 'Data - People' sheet (Employee IDs {', '.join(sorted(investigators.loc[duplicates, 'empl_id'].unique()))}, rows {_sheet_rows(investigators.index[duplicates])})")
+    investigators = investigators[~missing_ids].drop_duplicates("empl_id").set_index("empl_id")
+
+    associations = pd.DataFrame({
+        "empl_id": _normalize_id_column(association_dataframe["EMP ID"]),
+        "association": association_dataframe["ASSOCIATION"]
+    })
+    missing_assoc_ids = associations["empl_id"].isna()
+    if missing_assoc_ids.any():
+        problems.append(f"{missing_assoc_ids.sum()} investigator(s) are missing an Employee ID in 'Data - Associations' sheet (rows {_sheet_rows(associations.index[missing_assoc_ids])})")
+    missing_associations = ~missing_assoc_ids & (associations["association"].isna() | (associations["association"] == ""))
+    if missing_associations.any():
+        problems.append(f"Investigator is missing Association in 'Data - Associations' sheet (Employee IDs {', '.join(associations.loc[missing_associations, 'empl_id'])}, rows {_sheet_rows(associations.index[missing_associations])})")
+    if duplicates.any():
+        raise Exception("Could not build the investigators table:\n" + "\n".join(problems))
+
+    # The last association listed for an investigator wins, associations of unknown investigators are ignored
+    associations = associations[~missing_assoc_ids & ~missing_associations].drop_duplicates("empl_id", keep="last").set_index("empl_id")
+    investigators["association"] = associations["association"].reindex(investigators.index)
+    return investigators, problems
+
+def investigator_table_to_dict(investigators):
+    """
+    Converts the table built by 'build_investigator_table' into the dictionary of investigators keyed by employee id.
+    Investigators without an association are left without an 'association' key.
+    """
+    records = dict()
+    for empl_id, first_name, middle_name, last_name, email, association in zip(investigators.index, investigators["first"], investigators["middle"], investigators["last"], investigators["email"], investigators["association"]):
+        records[empl_id] = {
+            "name": {
+                "first": first_name,
+                "middle": middle_name,
+                "last": last_name
+            },
+            "email": email
+        }
+        if not pd.isna(association):
+            records[empl_id]["association"] = association
+    return records
@@ -1,5 +1,9 @@
-from datetime import datetime
+import numpy as np
+import pandas as pd
 from methods.utils import strip_html, find_closest_match, format_string, extract_titles
+from classes.Diagnostic import Diagnostic
+from classes.DisciplineResolver import DisciplineResolver
+from methods.budget_periods import MAX_BUDGET_PERIODS
 
 ACTIVITY_ASSOCIATIONS = {
     'Research': 'Research on Campus',
@@ -14,153 +18,286 @@ ACTIVITY_ASSOCIATIONS = {
     'Student Support': 'Fellowship'
 }
 
+FUNDED_STATUS_THRESHOLD = pd.Timestamp('2024-01-01')
+PENDING_STATUS_THRESHOLD = pd.Timestamp('2024-06-30')
+CLOSED_STATUSES = ["Withdrawn", "Unsubmitted", "Rejected"]
+
+STATUS_ERRORS = {
+    "funded_missing_date": "Funded grant is not assigned an 'End_Date_Req' value in the database which is crucial towards determining a status.",
+    "pending_missing_date": "Pending grant is missing a 'Start_Date_Req' value in the database which is crucial towards determining a status.",
+    "invalid_status": "Grant was assigned an invalid Status in the database.",
+    "missing_status": "Grant is missing a Status in the database."
+}
+STATUS_ERROR_CODES = {message: code for code, message in STATUS_ERRORS.items()}
+DISCIPLINE_ERROR_CODES = {message: code for code, message in DisciplineResolver.ERRORS.items()}
+
+def _first_available_date(frame, columns):
+    # Mirrors the "a or b or c" fallback by taking the first column that holds a date for each row
+    result = pd.Series(pd.NaT, index=frame.index, dtype="datetime64[ns]")
+    for col in columns:
+        if col in frame:
+            result = result.fillna(pd.to_datetime(frame[col], errors='coerce'))
+    return result
+
+def compute_statuses(frame):
+    """
+    Determines the OAR status of every grant in a DataFrame at once.
+
+    Parameters:
+    - frame: DataFrame with the columns of the grants table (Status, Start_Date_Req, End_Date_Req, ...).
+
+    Returns:
+    - A tuple of two Series aligned with the frame's index: the determined status of each grant and
+      the reason a status could not be determined (None where the status was determined).
+    """
+    if frame.empty:
+        return pd.Series(index=frame.index, dtype=object), pd.Series(index=frame.index, dtype=object)
+
+    project_status = frame['Status'].astype(str).str.capitalize()
+    end_date = _first_available_date(frame, ['End_Date_Req', 'End_Date', 'Date_Submitted'])
+    start_date = _first_available_date(frame, ['Start_Date_Req', 'Date_Submitted', 'Start_Date'])
+
+    is_missing = (project_status == "")
+    is_funded = (project_status == "Funded")
+    is_pending = (project_status == "Pending")
+    is_closed = project_status.isin(CLOSED_STATUSES)
+    is_invalid = ~(is_missing | is_funded | is_pending | is_closed)
+
+    statuses = np.select(
+        [
+            is_funded & end_date.notna(),
+            is_pending & start_date.notna(),
+            is_closed
+        ],
+        [
+            np.where(end_date >= FUNDED_STATUS_THRESHOLD, "Active", "Closed"),
+            np.where(start_date >= PENDING_STATUS_THRESHOLD, "Active", "Closed"),
+            "Closed"
+        ],
+        default=None
+    )
+    errors = np.select(
+        [
+            is_funded & end_date.isna(),
+            is_pending & start_date.isna(),
+            is_invalid,
+            is_missing
+        ],
+        [
+            STATUS_ERRORS["funded_missing_date"],
+            STATUS_ERRORS["pending_missing_date"],
+            STATUS_ERRORS["invalid_status"],
+            STATUS_ERRORS["missing_status"]
+        ],
+        default=None
+    )
+    return pd.Series(statuses, index=frame.index, dtype=object), pd.Series(errors, index=frame.index, dtype=object)
+
+def _locate(diagnostics, column, grant_ids):
+    # Gives every diagnostic the sheet column and Grant_ID of the row it belongs to
+    if grant_ids is None:
+        grant_ids = [None] * len(diagnostics)
+    return [
+        (diagnostic.at(column, grant_id) if diagnostic else None)
+        for diagnostic, grant_id in zip(diagnostics, grant_ids)
+    ]
+
+def resolve_statuses(frame, column = None):
+    """
+    Determines the OAR status of every grant in a DataFrame without raising.
+
+    Parameters:
+    - frame: DataFrame with the columns of the grants table, including 'Grant_ID'.
+    - column: The sheet column the diagnostics belong to.
+
+    Returns:
+    - A Series with the status of each grant and a list of Diagnostics aligned with it (None where the status was determined).
+    """
+    statuses, errors = compute_statuses(frame)
+    diagnostics = [
+        (Diagnostic(STATUS_ERROR_CODES[error], error) if error else None)
+        for error in errors
+    ]
+    grant_ids = frame['Grant_ID'].tolist() if 'Grant_ID' in frame else None
+    return statuses, _locate(diagnostics, column, grant_ids)
+
+def resolve_grant_status(grant, column = None):
+    statuses, diagnostics = resolve_statuses(pd.DataFrame([grant]), column)
+    return statuses.iloc[0], diagnostics[0]
+
 def determine_grant_status(grant):
-    project_status = str(grant['Status']).capitalize()
-    if project_status:
-        if project_status == "Funded":
-            funded_threshold = datetime.strptime('2024-01-01', '%Y-%m-%d')
-            project_end_date = grant['End_Date_Req'] or grant['End_Date'] or grant['Date_Submitted']
-            if project_end_date:
-                return ("Active" if project_end_date >= funded_threshold else "Closed")
-            else:
-                raise Exception("Funded grant is not assigned an 'End_Date_Req' value in the database which is crucial towards determining a status.")
-        elif project_status == "Pending":
-            pending_threshold =  datetime.strptime('2024-06-30', '%Y-%m-%d')
-            project_start_date = grant['Start_Date_Req'] or grant['Date_Submitted'] or grant['Start_Date']
-            if project_start_date:
-                return ("Active" if project_start_date >= pending_threshold else "Closed")
-            else:
-                raise Exception("Pending grant is missing a 'Start_Date_Req' value in the database which is crucial towards determining a status.")
-        elif project_status in ["Withdrawn","Unsubmitted","Rejected"]:
-            return "Closed"
-        else:
-            raise Exception("Grant was assigned an invalid Status in the database.")
-    else:
-        raise Exception("Grant is missing a Status in the database.")
-    
-# Needs fixing
-def determine_grant_discipline(instance, grant):
-    valid_disciplines = instance.DISCIPLINES
+    status, diagnostic = resolve_grant_status(grant)
+    if diagnostic:
+        raise Exception(diagnostic.message)
+    return status
+
+def resolve_budget_periods(instance, grant_ids, column = None):
+    """
+    Looks up the budget of every grant, flagging the grants with more budget periods than the sheets have yearly columns for.
+
+    Returns:
+    - A DataFrame with the budget of each grant and a list of Diagnostics aligned with it (None where every period fits).
+    """
+    grant_ids = list(grant_ids)
+    budget = instance.BUDGET_PERIODS.reindex(grant_ids).reset_index(drop=True)
+    diagnostics = [
+        (Diagnostic("extra_budget_periods", f"Grant has {MAX_BUDGET_PERIODS + extra_periods} budget periods, only the first {MAX_BUDGET_PERIODS} are filled in the yearly cost columns.") if extra_periods else None)
+        for extra_periods in budget['extra_periods'].fillna(0)
+    ]
+    return budget, _locate(diagnostics, column, grant_ids)
+
+def resolve_disciplines(instance, values, grant_ids = None, column = None):
+    """
+    Resolves a list of discipline IDs or names, matching every distinct value once.
+
+    Returns:
+    - A list with the discipline names and a list of Diagnostics aligned with the values (None where resolved).
+    """
+    names, errors = instance.DISCIPLINE_RESOLVER.resolve_all(values)
+    diagnostics = [
+        (Diagnostic(DISCIPLINE_ERROR_CODES[error], error) if error else None)
+        for error in errors
+    ]
+    return names, _locate(diagnostics, column, grant_ids)
+
+def resolve_grant_discipline(instance, grant, column = None):
     project_discipline = grant['Discipline'] or grant['Primary_Dept']   # 1600 -> 450
-    if project_discipline:
-        
-        if project_discipline.isdigit():
-            project_discipline = int(project_discipline)
-            if project_discipline in valid_disciplines:
-                return valid_disciplines[project_discipline]
-            else:
-                # print("Invalid discipline(Int): ", project_discipline)
-                raise Exception("Grant does not have a valid Discipline ID in the database")
+    names, diagnostics = resolve_disciplines(instance, [project_discipline], [grant.get('Grant_ID')], column)
+    return names[0], diagnostics[0]
+
+def determine_grant_discipline(instance, grant):
+    # Disciplines are loaded once from LU_Discipline and every distinct value is only resolved once
+    discipline_name, diagnostic = resolve_grant_discipline(instance, grant)
+    if diagnostic:
+        raise Exception(diagnostic.message)
+    return discipline_name
+
+def resolve_admin_units(instance, departments, grant_ids = None, column = None):
+    """
+    Resolves a list of departments to their admin unit, admin unit code and center, matching every distinct department once.
+
+    Returns:
+    - A list of (unit, code, center) tuples and a list of Diagnostics aligned with the departments (None where resolved).
+    """
+    admin_units, diagnostics = [], []
+    for department, (unit_name, unit_code, center_name, error) in zip(departments, instance.ADMIN_UNIT_RESOLVER.resolve_all(departments)):
+        admin_units.append((unit_name, unit_code, center_name))
+        if not error:
+            diagnostics.append(None)
         else:
-            if project_discipline in valid_disciplines.values():
-                return project_discipline
-            else:
-                closest_match = find_closest_match(project_discipline, valid_disciplines.values())
-                if closest_match:
-                    # print("Closest discipline(String): ", project_discipline, closest_match)
-                    return project_discipline
-                else:
-                    # print("Invalid discipline(String): ", project_discipline)
-                    raise Exception("Grant does not have a valid Discipline in the database")
-    else:
-        raise Exception("Grant does not have a Discipline in the database")
-    
+            diagnostics.append(Diagnostic(("invalid_department" if department else "missing_department"), error))
+    return admin_units, _locate(diagnostics, column, grant_ids)
+
+def resolve_grant_admin_unit(instance, grant, column = None):
+    admin_units, diagnostics = resolve_admin_units(instance, [grant['Primary_Dept']], [grant.get('Grant_ID')], column)
+    return admin_units[0], diagnostics[0]
+
 # Needs fixing
 def determine_grant_admin_unit(instance, grant):
-    org_units = instance.ORG_UNITS
-    org_centers = instance.ORG_CENTERS
-    project_primary_dept = grant['Primary_Dept']
-    
-    if project_primary_dept:
-        org_unit_keys = [str(item) for item in org_units.keys()]
-        if project_primary_dept in org_unit_keys:
-            return project_primary_dept, org_units[project_primary_dept]['Primary Code'], None
-        else:
-            closest_valid_dept = find_closest_match(project_primary_dept, org_unit_keys)
-            if closest_valid_dept:
-                return closest_valid_dept, org_units[closest_valid_dept]['Primary Code'], None
-            else:
-                org_center_keys = [str(item) for item in org_centers.keys()]
-                if project_primary_dept in org_center_keys:
-                    project_center = org_centers[project_primary_dept]
-                    return project_center['Admin Unit'], project_center['Admin Unit Code'], project_primary_dept
-                else:
-                    closest_valid_center = find_closest_match(project_primary_dept, org_center_keys)
-                    if closest_valid_center:
-                        project_center = org_centers[closest_valid_center]
-                        return project_center['Admin Unit'], project_center['Admin Unit Code'], closest_valid_center
-                    else:
-                        raise Exception(f"Failed to determine a valid department for {project_primary_dept}")
-    else:
-        raise Exception("Grant does not have a primary department in the database.")
-    
+    # The org unit and center lookups are prepared once by the MigrationManager
+    admin_unit, diagnostic = resolve_grant_admin_unit(instance, grant)
+    if diagnostic:
+        raise Exception(diagnostic.message)
+    return admin_unit
+
+def resolve_instrument_types(instance, award_types, grant_ids, column = None):
+    """
+    Classifies the 'Award Type' of every grant, matching each distinct value once.
+
+    Parameters:
+    - award_types: Series with the 'Award Type' of every grant.
+    - grant_ids: Series with the Grant_ID of every grant, aligned with award_types.
+    - column: The sheet column the diagnostics belong to.
+
+    Returns:
+    - A Series with the instrument types and a list of Diagnostics aligned with award_types (None where there was no error).
+    """
+    instrument_types, errors = instance.INSTRUMENT_TYPE_RESOLVER.classify(award_types, grant_ids)
+    diagnostics = [
+        (Diagnostic("invalid_award_type", error) if error else None)
+        for error in errors
+    ]
+    return instrument_types, _locate(diagnostics, column, grant_ids.tolist())
+
+def resolve_instrument_type(instance, grant, column = None):
+    instrument_types, diagnostics = resolve_instrument_types(instance, pd.Series([grant['Award Type']], dtype=object), pd.Series([grant['Grant_ID']], dtype=object), column)
+    return instrument_types.iloc[0], diagnostics[0]
+
 def determine_instrument_type(self, grant):
-    valid_types = self.INSTRUMENT_TYPES
-    project_award_type = grant['Award Type']
-
-    if project_award_type:
-        type_letter, type_title = project_award_type.split('-')
-        type_letter.strip()
-        type_title.strip()
-
-        for type_name, association in valid_types.items():
-            if type_letter in association.keys():
-                return type_name
-            closest_valid_type = find_closest_match(type_title, [str(item) for item in association.values()], case_sensitive=False)
-            if closest_valid_type:
-                return type_name
-
-    str_id = str(grant['Grant_ID'])
-    if str_id.startswith('6'):
-        return "PSC CUNY"
-        
+    # The letter map and title matcher are prepared once by the MigrationManager
+    return self.INSTRUMENT_TYPE_RESOLVER.determine(grant['Award Type'], grant['Grant_ID'])
+
+def match_sponsor(instance, sponsor):
+    """
+    Returns:
+    - The primary code of the organization that matches the sponsor, or None if no organization matches.
+    """
+    # The organization lookups are precomputed in the compiled configuration bundle
+    org_indexes = instance.CONFIG['indexes']
+    all_orgs = org_indexes['all_orgs']
+    inverse_orgs = org_indexes['inverse_orgs']
+    org_primary_names = org_indexes['org_primary_names']
+    org_alt_names = org_indexes['org_alt_names']
+    org_primary_names_lower = org_indexes['org_primary_names_lower']
+    org_alt_names_lower = org_indexes['org_alt_names_lower']
 
-def determine_sponsor(instance, sponsor):
-    if not sponsor:
-        raise Exception("Grant does not have a sponsor assigned to it in the database.")
-    
-    all_orgs = {
-        **instance.ORGANIZATIONS['existing_external_orgs'],
-        **instance.ORGANIZATIONS['non_existing_external_orgs']
-    }
-    inverse_orgs = {props.get('Alt Name'): name for name, props in all_orgs.items() if props.get('Alt Name')}
-    org_primary_names = list(all_orgs.keys())
-    org_alt_names = list(inverse_orgs.keys())
-    
     # First, check if the sponsor is an exact match in primary or alternate orgs
     if sponsor in org_primary_names:
         return all_orgs[sponsor]["Primary Code"]
-    
-    closest_valid_sponsor = find_closest_match(sponsor, org_primary_names, case_sensitive=False)
+
+    closest_valid_sponsor = find_closest_match(sponsor, org_primary_names, case_sensitive=False, lowered_list=org_primary_names_lower)
     if closest_valid_sponsor:
         return all_orgs[closest_valid_sponsor]["Primary Code"]
-    
+
     if sponsor in org_alt_names:
         return all_orgs[inverse_orgs[sponsor]]["Primary Code"]
-    
-    closest_valid_sponsor = find_closest_match(sponsor, org_alt_names, case_sensitive=False)
+
+    closest_valid_sponsor = find_closest_match(sponsor, org_alt_names, case_sensitive=False, lowered_list=org_alt_names_lower)
     if closest_valid_sponsor:
         return all_orgs[inverse_orgs[closest_valid_sponsor]]["Primary Code"]
-    
+
     # Extract titles and attempt title-based matching
     titles = extract_titles(sponsor)
 
     for title in titles:
         if title in org_primary_names:
             return all_orgs[title]["Primary Code"]
-        
-        closest_valid_sponsor = find_closest_match(title, org_primary_names, case_sensitive=False)
+
+        closest_valid_sponsor = find_closest_match(title, org_primary_names, case_sensitive=False, lowered_list=org_primary_names_lower)
         if closest_valid_sponsor:
             return all_orgs[closest_valid_sponsor]["Primary Code"]
-        
+
         if title in org_alt_names:
             return all_orgs[inverse_orgs[title]]["Primary Code"]
-        
-        closest_valid_sponsor = find_closest_match(title, org_alt_names, case_sensitive=False)
+
+        closest_valid_sponsor = find_closest_match(title, org_alt_names, case_sensitive=False, lowered_list=org_alt_names_lower)
         if closest_valid_sponsor:
             return all_orgs[inverse_orgs[closest_valid_sponsor]]["Primary Code"]
 
-    raise Exception(f"Failed to determine a sponsor code for '{sponsor}'")
+def resolve_sponsor(instance, sponsor, column = None, grant_id = None):
+    if not sponsor:
+        return None, Diagnostic("missing_sponsor", "Grant does not have a sponsor assigned to it in the database.", column, grant_id)
+    sponsor_code = match_sponsor(instance, sponsor)
+    if not sponsor_code:
+        return None, Diagnostic("invalid_sponsor", f"Failed to determine a sponsor code for '{sponsor}'", column, grant_id)
+    return sponsor_code, None
+
+def resolve_sponsors(instance, sponsors, grant_ids = None, column = None):
+    """
+    Resolves a list of sponsor names to their codes, matching every distinct sponsor once.
+
+    Returns:
+    - A list with the sponsor codes and a list of Diagnostics aligned with the sponsors (None where resolved).
+    """
+    resolved = {sponsor: resolve_sponsor(instance, sponsor) for sponsor in dict.fromkeys(sponsors)}
+    results = [resolved[sponsor] for sponsor in sponsors]
+    return [code for code, diagnostic in results], _locate([diagnostic for code, diagnostic in results], column, grant_ids)
+
+def determine_sponsor(instance, sponsor):
+    sponsor_code, diagnostic = resolve_sponsor(instance, sponsor)
+    if diagnostic:
+        raise Exception(diagnostic.message)
+    return sponsor_code
 
 def determine_activity_type(grant):
     award_type = grant['Award_Type']
@@ -1,26 +1,130 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 import difflib
+import hashlib
+import html
 import rapidfuzz
 import re
 
+# Matches a well formed start or end tag, including quoted attribute values that contain '>'
+SIMPLE_TAG_REGEX = re.compile(r"""</?[A-Za-z][^\s/>]*(?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?)*\s*/?>""")
+# Entities that BeautifulSoup and html.unescape decode the same way (numeric references are checked separately)
+SIMPLE_ENTITY_REGEX = re.compile(r"&(?:amp|lt|gt|quot|nbsp|#(\d{1,6})|#[xX]([0-9a-fA-F]{1,5}));")
+# Elements whose content BeautifulSoup does not treat as ordinary text
+COMPLEX_ELEMENT_REGEX = re.compile(r"<\s*(script|style|pre|textarea)\b", re.IGNORECASE)
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+# Abstracts are only parsed in a process pool when there are enough complex fragments to justify starting one
+ABSTRACT_POOL_THRESHOLD = 32
+# Cleaned abstracts keyed by content hash, the least recently used ones are dropped once the cache is full
+ABSTRACT_CACHE_SIZE = 4096
+ABSTRACT_CACHE = OrderedDict()
+
 # A helper function that strips HTML tags
 def strip_html(html_content):
     soup = BeautifulSoup(html_content, "html.parser")
     return soup.get_text()
 
+def _is_simple_entity(match):
+    # Control characters, C1 characters, surrogates and noncharacters are decoded differently by the two implementations
+    code_point = match.group(1) or match.group(2)
+    if code_point is None:
+        return True
+    code_point = int(code_point) if match.group(1) else int(code_point, 16)
+    return (0x20 <= code_point < 0x7F) or (0xA0 <= code_point < 0xD800) or (0xE000 <= code_point < 0xFDD0) or (0xFDF0 <= code_point <= 0xFFFD)
+
+def _decode_text_segment(segment):
+    if '&' in segment:
+        entities = list(SIMPLE_ENTITY_REGEX.finditer(segment))
+        if not all(_is_simple_entity(entity) for entity in entities) or segment.count('&') != len(entities):
+            return None
+        segment = html.unescape(segment)
+    # BeautifulSoup collapses text nodes that only contain whitespace
+    if segment and not segment.strip(ASCII_SPACES):
+        return '\n' if '\n' in segment else ' '
+    return segment
+
+def strip_simple_html(html_content):
+    """
+    Strips the tags and decodes the entities of simple HTML fragments without building a parse tree.
+
+    Returns:
+        str: The same text BeautifulSoup would extract, or None if the fragment is too complex and should be parsed with BeautifulSoup.
+    """
+    if COMPLEX_ELEMENT_REGEX.search(html_content):
+        return None
+    # Every text segment between two tags is decoded the same way the parser decodes each text node
+    segments = []
+    for segment in SIMPLE_TAG_REGEX.split(html_content):
+        if '<' in segment:
+            return None
+        segment = _decode_text_segment(segment)
+        if segment is None:
+            return None
+        segments.append(segment)
+    return ''.join(segments)
+
+def clean_abstracts(abstracts):
+    """
+    Strips the HTML from a list of grant abstracts.
+    Markup-free abstracts are returned as is, simple fragments are handled by strip_simple_html and only
+    complex fragments are parsed with BeautifulSoup (in a process pool when there are many of them).
+    Results are memoised by the hash of the abstract's content, keeping the ABSTRACT_CACHE_SIZE most recently used.
+
+    Parameters:
+        abstracts (list): The abstracts to clean, missing abstracts may be None.
+
+    Returns:
+        list: The cleaned abstracts aligned with the input, None for missing abstracts.
+    """
+    digests = [(hashlib.sha1(abstract.encode('utf-8')).hexdigest() if abstract else None) for abstract in abstracts]
+
+    cleaned = dict()
+    complex_abstracts = dict()
+    for digest, abstract in zip(digests, abstracts):
+        if not digest or digest in cleaned or digest in complex_abstracts:
+            continue
+        if digest in ABSTRACT_CACHE:
+            cleaned[digest] = ABSTRACT_CACHE[digest]
+            continue
+        cleaned_abstract = strip_simple_html(abstract)
+        if cleaned_abstract is None:
+            complex_abstracts[digest] = abstract
+        else:
+            cleaned[digest] = cleaned_abstract
+
+    if len(complex_abstracts) >= ABSTRACT_POOL_THRESHOLD:
+        with ProcessPoolExecutor() as executor:
+            cleaned_abstracts = executor.map(strip_html, complex_abstracts.values(), chunksize=16)
+            cleaned.update(zip(complex_abstracts.keys(), cleaned_abstracts))
+    else:
+        cleaned.update((digest, strip_html(abstract)) for digest, abstract in complex_abstracts.items())
+
+    for digest, cleaned_abstract in cleaned.items():
+        ABSTRACT_CACHE[digest] = cleaned_abstract
+        ABSTRACT_CACHE.move_to_end(digest)
+    while len(ABSTRACT_CACHE) > ABSTRACT_CACHE_SIZE:
+        ABSTRACT_CACHE.popitem(last=False)
+
+    return [(cleaned[digest] if digest else None) for digest in digests]
+
 # def find_closest_match(input, list):
 #     closest_match = difflib.get_close_matches(input, list, n=1, cutoff=0.85)
 #     return closest_match[0] if closest_match else None
 
-def find_closest_match(input, string_list, threshold=80, case_sensitive=True):
+def find_closest_match(input, string_list, threshold=80, case_sensitive=True, lowered_list=None):
     if not isinstance(input, str):
         raise ValueError("The input must be a string.")
     
     if not isinstance(string_list, list) or not all(isinstance(s, str) for s in string_list):
         raise ValueError("string_list must be a list of strings.")
     
+    # Callers matching against the same list repeatedly can pass its lowercased copy instead of having it rebuilt every call
+    if not case_sensitive and lowered_list is None:
+        lowered_list = [item.lower() for item in string_list]
+    
     # Use rapidfuzz.process to calculate similarity scores for all strings
-    matches = rapidfuzz.process.extract(input if case_sensitive else input.lower(), string_list if case_sensitive else [item.lower() for item in string_list], scorer=rapidfuzz.fuzz.ratio, score_cutoff=threshold)
+    matches = rapidfuzz.process.extract(input if case_sensitive else input.lower(), string_list if case_sensitive else lowered_list, scorer=rapidfuzz.fuzz.ratio, score_cutoff=threshold)
     
     if not matches:
         return None
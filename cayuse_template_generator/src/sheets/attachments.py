@@ -1,4 +1,5 @@
-from methods.shared_populating import determine_grant_status
+import pandas as pd
+from methods.shared_populating import compute_statuses
 
 SHEET_NAME = "Attachments - Template"
 SHEET_COLUMNS = [
@@ -20,8 +21,10 @@ SHEET_COLUMNS = [
 
 def attachments_sheet_append(self, grants):
     sheet_df = self.generated_template_manager.df[SHEET_NAME]
+    # Determine the status of every grant in a single pass
+    grant_statuses, grant_status_errors = compute_statuses(pd.DataFrame([grant_obj['grant_data'] for grant_obj in grants]))
     
-    for grant_obj in grants:
+    for grant_index, grant_obj in enumerate(grants):
         next_row = sheet_df.shape[0] + 1
         grant_data = grant_obj['grant_data']
         
@@ -39,15 +42,13 @@ def attachments_sheet_append(self, grants):
         grant_sponsor_2 = grant_data['Sponsor_2']
         grant_title = grant_data['Project_Title']
         
-        grant_oar = None
-        try:
-                grant_oar = determine_grant_status(grant_data)
-        except Exception as err:
+        grant_oar = grant_statuses.iloc[grant_index]
+        if grant_status_errors.iloc[grant_index]:
             self.generated_template_manager.comment_manager.append_comment(
                 SHEET_NAME,
                 next_row,
                 12,
-                err
+                grant_status_errors.iloc[grant_index]
             )
         
         self.generated_template_manager.append_row(SHEET_NAME, {
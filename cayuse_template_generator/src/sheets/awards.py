@@ -1,5 +1,7 @@
-from methods.utils import find_closest_match, strip_html
-from methods.shared_populating import determine_grant_status, determine_instrument_type, determine_sponsor, determine_activity_type, determine_grant_discipline, determine_grant_admin_unit
+import pandas as pd
+from methods.utils import find_closest_match, clean_abstracts
+from methods.shared_populating import resolve_statuses, resolve_instrument_types, resolve_sponsors, resolve_disciplines, resolve_admin_units, resolve_budget_periods, determine_activity_type
+from methods.budget_periods import MAX_BUDGET_PERIODS
 
 SHEET_NAME = "Award - Template"
 SHEET_COLUMNS = [
@@ -238,91 +240,108 @@ SHEET_COLUMNS = [
 #         "Award Type": ""
 #     })
 
+def budget_columns(grant_budget):
+    columns = {
+        "Number of Budget Periods": grant_budget['periods'],
+        "Total Awarded Direct Costs": grant_budget['direct'],
+        "Total Awarded Indirect Costs": grant_budget['indirect'],
+        "Total Expected Amount": grant_budget['total']
+    }
+    for year in range(1, MAX_BUDGET_PERIODS + 1):
+        columns[f"Yr {year} Direct Costs"] = grant_budget[f"direct_{year}"]
+        columns[f"Year {year} Indirect Costs"] = grant_budget[f"indirect_{year}"]
+        columns[f"Year {year} Total Costs"] = grant_budget[f"total_{year}"]
+        columns[f"Awarded Yr {year} Direct Costs"] = grant_budget[f"awarded_direct_{year}"]
+        columns[f"Awarded Yr {year} Indirect Costs"] = grant_budget[f"awarded_indirect_{year}"]
+        columns[f"Awarded Yr {year} Total Costs"] = grant_budget[f"awarded_total_{year}"]
+    return columns
+
 def awards_sheet_append(self, grants):
     sheet_df = self.generated_template_manager.df[SHEET_NAME]
-    for grant_obj in grants:
-        next_row = sheet_df.shape[0] + 1
+    funded_grants = [grant_obj for grant_obj in grants if grant_obj['grant_data']['Status'] == "Funded"]
+    if not funded_grants:
+        return
+    # Only the abstracts of funded grants end up in the sheet
+    abstracts = clean_abstracts([grant_obj['grant_data']['Abstract'] for grant_obj in funded_grants])
+    
+    # Every value is resolved for all the funded grants at once, problems come back as diagnostics instead of exceptions
+    frame = pd.DataFrame([grant_obj['grant_data'] for grant_obj in funded_grants], dtype=object)
+    grant_ids = frame['Grant_ID'].tolist()
+    statuses, status_diagnostics = resolve_statuses(frame, 4)
+    instrument_types, instrument_diagnostics = resolve_instrument_types(self, frame['Award Type'], frame['Grant_ID'], 7)
+    sponsor_codes, sponsor_diagnostics = resolve_sponsors(self, frame['Sponsor_1'].tolist(), grant_ids, 8)
+    prime_sponsors, prime_sponsor_diagnostics = resolve_sponsors(self, frame['Sponsor_2'].tolist(), grant_ids, 12)
+    disciplines, discipline_diagnostics = resolve_disciplines(self, [
+        grant_obj['grant_data']['Discipline'] or grant_obj['grant_data']['Primary_Dept'] for grant_obj in funded_grants
+    ], grant_ids, 26)
+    admin_units, admin_unit_diagnostics = resolve_admin_units(self, frame['Primary_Dept'].tolist(), grant_ids, 25)
+    budgets, budget_diagnostics = resolve_budget_periods(self, grant_ids, 35)
+    budgets = budgets.to_dict(orient='records')
+    
+    existing_grants = list()
+    for grant_id in grant_ids:
+        existing_grant = self.feedback_template_manager.get_entry(SHEET_NAME, "awardLegacyNumber", f"{grant_id}-award")
+        existing_grants.append(existing_grant if existing_grant is not None else {})
+    # Grants without a status fall back to the status and dates of their existing award, all resolved together
+    fallback_positions = [
+        grant_index for grant_index, (grant_oar, existing_grant) in enumerate(zip(statuses, existing_grants))
+        if not grant_oar and len(existing_grant)
+    ]
+    fallback_statuses, fallback_diagnostics = resolve_statuses(pd.DataFrame([
+        {
+            **funded_grants[grant_index]['grant_data'],
+            "Status": existing_grants[grant_index].get('status'),
+            "Start_Date_Req": existing_grants[grant_index].get('Project Start Date'),
+            "End_Date_Req": existing_grants[grant_index].get('Project End Date')
+        } for grant_index in fallback_positions
+    ], columns=frame.columns))
+    fallbacks = dict(zip(fallback_positions, zip(fallback_statuses, fallback_diagnostics)))
+    
+    comment_rows, comment_cols, comment_messages = [], [], []
+    first_row = sheet_df.shape[0] + 1
+    for grant_index, grant_obj in enumerate(funded_grants):
+        next_row = first_row + grant_index
         grant_data = grant_obj['grant_data']
         
         grant_id = grant_data['Grant_ID']
         grant_status = grant_data['Status']
-        if grant_status != "Funded":
-            continue
         
-        total_data = grant_obj['total_data']
-        rifunds_data = grant_obj['rifunds_data']
         dates_data = grant_obj['dates_data']
         cost_share_data = grant_obj['cost_share_data']
-        ffunds_data = grant_obj['ffunds_data']
-        fifunds_data = grant_obj['fifunds_data']
+        grant_budget = budgets[grant_index]
         
         grant_pln = grant_data['Project_Legacy_Number']
-        existing_grant = self.feedback_template_manager.get_entry(SHEET_NAME, "awardLegacyNumber", f"{grant_id}-award")
-        if existing_grant == None:
-            existing_grant = {}
+        existing_grant = existing_grants[grant_index]
         
-        grant_oar = None
-        try:
-            grant_oar = determine_grant_status(grant_data)
-        except Exception as err:
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                4,
-                err
-            )
-        if not grant_oar and existing_grant:
-            grant_status = existing_grant['status']
-            try:
-                grant_oar = determine_grant_status(**grant_data, **{
-                    "Status": existing_grant['Status'],
-                    "Start_Date_Req": existing_grant['Project Start Date'],
-                    "End_Date_Req": existing_grant['Project End Date']
-                })
-            except Exception as err:
-                print("Error using existing grant to determine OAR Status: ", err)
+        grant_diagnostics = []
+        grant_oar = statuses.iloc[grant_index]
+        grant_diagnostics.append(status_diagnostics[grant_index])
+        if grant_index in fallbacks:
+            grant_status = existing_grant.get('status')
+            grant_oar, diagnostic = fallbacks[grant_index]
+            if diagnostic:
+                print("Error using existing grant to determine OAR Status: ", diagnostic)
                 
         grant_primary_college = grant_data['Prim_College'] or existing_grant.get("CUNY Campus")
         
-        grant_instrument_type = None
-        try:
-            grant_instrument_type = determine_instrument_type(self, grant_data)
-        except Exception as err:
+        grant_instrument_type = instrument_types.iloc[grant_index]
+        if instrument_diagnostics[grant_index]:
             grant_instrument_type = existing_grant.get("Instrument Type")
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                7,
-                err
-            )
+            grant_diagnostics.append(instrument_diagnostics[grant_index])
             
-        grant_sponsor = None
-        grant_sponsor_code = None
-        try:
-            grant_sponsor_code = determine_sponsor(self, grant_data['Sponsor_1'])
-            grant_sponsor = grant_data['Sponsor_1']
-        except Exception as err:
+        grant_sponsor = grant_data['Sponsor_1']
+        grant_sponsor_code = sponsor_codes[grant_index]
+        if sponsor_diagnostics[grant_index]:
             grant_sponsor = existing_grant.get("Sponsor")
             grant_sponsor_code = existing_grant.get("Sponsor Code")
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                8,
-                err
-            )
+            grant_diagnostics.append(sponsor_diagnostics[grant_index])
         
         grant_prime_sponsor = None
         if grant_data['Sponsor_2']:
-            try:
-                grant_prime_sponsor = determine_sponsor(self, grant_data['Sponsor_2'])
-            except Exception as err:
+            grant_prime_sponsor = prime_sponsors[grant_index]
+            if prime_sponsor_diagnostics[grant_index]:
                 grant_prime_sponsor = existing_grant.get('Prime Sponsor')
-                self.generated_template_manager.comment_manager.append_comment(
-                    SHEET_NAME,
-                    next_row,
-                    12,
-                    err
-                )
+                grant_diagnostics.append(prime_sponsor_diagnostics[grant_index])
         
         grant_award_no = grant_data['Award_No'] or existing_grant.get('Sponsor Award Number')
         grant_title = grant_data['Project_Title'] or existing_grant.get('Title')
@@ -331,49 +350,31 @@ def awards_sheet_append(self, grants):
         project_end_date = dates_data.get('EndDate') or existing_grant.get('Project End Date')
         program_name = grant_data['Program_Type'] or existing_grant.get('Program Name')
         
-        grant_activity_type = None
-        try:
-            grant_activity_type = determine_activity_type(grant_data)
-        except Exception as err:
-            grant_activity_type = existing_grant.get('Activity Type')
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                22,
-                err
-            )
+        grant_activity_type = determine_activity_type(grant_data)
             
-        grant_discipline = None
-        try:
-            grant_discipline = determine_grant_discipline(self, grant_data)
-        except Exception as err:
+        grant_discipline = disciplines[grant_index]
+        if discipline_diagnostics[grant_index]:
             grant_discipline = existing_grant.get('Discipline')
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                26,
-                err
-            )
+            grant_diagnostics.append(discipline_diagnostics[grant_index])
             
-        grant_abstract = (strip_html(grant_data['Abstract']) if grant_data['Abstract'] else None) or existing_grant.get('Abstract')
+        grant_abstract = abstracts[grant_index] or existing_grant.get('Abstract')
         
         award_legacy_no = grant_data['Award_No'] or existing_grant.get('Award Legacy Number')
         
-        grant_admin_unit_name, grant_admin_unit_code, grant_admin_unit_center = (None,None,None)
-        try:
-            grant_admin_unit_name, grant_admin_unit_code, grant_admin_unit_center = determine_grant_admin_unit(self, grant_data)
-        except Exception as err:
+        grant_admin_unit_name, grant_admin_unit_code, grant_admin_unit_center = admin_units[grant_index]
+        if admin_unit_diagnostics[grant_index]:
             grant_admin_unit_code = existing_grant.get('Admin Unit')
             grant_admin_unit_center = existing_grant.get('John Jay Centers')
             grant_admin_unit_name = existing_grant.get('Admin Unit Name')
-            self.generated_template_manager.comment_manager.append_comment(
-                SHEET_NAME,
-                next_row,
-                25,
-                err
-            )
+            grant_diagnostics.append(admin_unit_diagnostics[grant_index])
+        grant_diagnostics.append(budget_diagnostics[grant_index])
+        
+        for diagnostic in grant_diagnostics:
+            if diagnostic:
+                comment_rows.append(next_row)
+                comment_cols.append(diagnostic.column)
+                comment_messages.append(diagnostic.message)
             
-        grant_num_budget_periods = len(total_data)
         grant_rate_cost_type = None
         if grant_data['RIndir%DC']:
             num_direct = float(grant_data['RIndir%DC'])
@@ -386,9 +387,6 @@ def awards_sheet_append(self, grants):
                 
         grant_idc_rate = round((float(grant_data['RIndir%DC']) if grant_rate_cost_type == "Total Direct Costs (TDC)" else (float(grant_data['RIndir%Per']) if grant_rate_cost_type == "Salary and Wages (SW)" else 0)) * 100, 1)
         grant_idc_cost_type_explain = grant_data['Indirect_Deviation']
-        grant_total_expected_amount = round(sum(map(lambda fund: fund['RAmount'], total_data)))
-        grant_total_awarded_indirect_amount = round(sum(map(lambda fund: fund['RIAmount'], rifunds_data)))
-        grant_total_awarded_direct_amount = round(grant_total_expected_amount - grant_total_awarded_indirect_amount)
         
         def safe_convert(x):
             if x == None:
@@ -398,20 +396,6 @@ def awards_sheet_append(self, grants):
             except (TypeError, ValueError):
                 return 0
         
-        first_year_indirect_costs = 0
-        if rifunds_data:
-            first_fund = min(rifunds_data, key=lambda x: safe_convert(x["RIGrant_Year"]))
-            first_year_indirect_costs = round(first_fund['RIAmount'])
-        first_year_total_costs = 0
-        if total_data:
-            first_fund = min(total_data, key=lambda x: safe_convert(x['RGrant_Year']))
-            first_year_total_costs = round(first_fund['RAmount'])
-        first_year_direct_costs = round(first_year_total_costs - first_year_indirect_costs)
-        
-        first_year_awarded_total_costs = round(sum(map(lambda fund: safe_convert(fund['FAmount']), ffunds_data)))
-        first_year_awarded_indirect_costs = round(sum(map(lambda fund: safe_convert(fund['FIAmount']), fifunds_data)))
-        first_year_awarded_direct_costs = round(first_year_awarded_total_costs - first_year_awarded_indirect_costs)
-        
         grant_total_cost_share = round(sum(map(lambda fund: safe_convert(fund['CSBudAmount']), cost_share_data)))
         
         grant_has_subrecipient = "Yes" if grant_data['Subrecipient_1'] else "No"
@@ -446,21 +430,12 @@ def awards_sheet_append(self, grants):
             "Admin Unit": grant_admin_unit_code,
             "John Jay Centers": grant_admin_unit_center,
             "Discipline": grant_discipline,
-            "Abstract": "",
+            "Abstract": grant_abstract,
             "Award Legacy Number": award_legacy_no,
-            "Number of Budget Periods": grant_num_budget_periods,
             "Indirect Rate Cost Type": grant_rate_cost_type,
             "IDC Rate": grant_idc_rate,
             "IDC Cost Type Explanation": grant_idc_cost_type_explain,
-            "Total Awarded Direct Costs": grant_total_awarded_direct_amount,
-            "Total Awarded Indirect Costs": grant_total_awarded_indirect_amount,
-            "Total Expected Amount": grant_total_expected_amount,
-            "Yr 1 Direct Costs": first_year_direct_costs,
-            "Year 1 Indirect Costs": first_year_indirect_costs,
-            "Year 1 Total Costs": first_year_total_costs,
-            "Awarded Yr 1 Direct Costs": first_year_awarded_direct_costs,
-            "Awarded Yr 1 Indirect Costs": first_year_awarded_indirect_costs,
-            "Awarded Yr 1 Total Costs": first_year_awarded_total_costs,
+            **budget_columns(grant_budget),
             "Total Cost Share": grant_total_cost_share,
             "Human Subjects": grant_has_human_subjects,
             "IRB Protocol Status": grant_has_irb_approval,
@@ -471,4 +446,5 @@ def awards_sheet_append(self, grants):
             "Off Site": "",
             "Subrecipient": grant_has_subrecipient,
             "Export Control": grant_has_export_control
-        })
\ No newline at end of file
+        })
+    self.generated_template_manager.comment_manager.append_comments(SHEET_NAME, comment_rows, comment_cols, comment_messages)
@@ -20,25 +20,19 @@ SHEET_COLUMNS = [
   ]
 
 def determine_pi_info(instance, grant):
-    investigators = instance.INVESTIGATORS
     project_investigator = grant['grant_data']['Primary_PI']
-    reverse_investigators = {f"{props['name']['last']}, {props['name']['first']}": name for name, props in investigators.items()}
     num_investigators_involved = len(grant['pi_data'])
     investigator_role = ("Principal Investigator" if num_investigators_involved < 2 else ("Co-Principal Investigator" if num_investigators_involved < 3 else "Other Participant"))
     
-    if project_investigator in reverse_investigators:
-        investigator_info = investigators[reverse_investigators[project_investigator]]
-        return investigator_info['email'], investigator_role, investigator_info['association']
-        
-    alt_investigators = instance.INVESTIGATORS_ALT
-    if project_investigator in alt_investigators:
-        investigator_info = alt_investigators[project_investigator]
-        return investigator_info['username'], investigator_role, investigator_info['association']
+    resolved_investigator, diagnostic = instance.INVESTIGATOR_INDEX.resolve(project_investigator)
+    if resolved_investigator != None:
+        investigator_username, investigator_association = resolved_investigator
+        return investigator_username, investigator_role, investigator_association, diagnostic
         
     first_name, last_name = project_investigator.split(',')
     first_name.strip()
     last_name.strip()
-    return f"{first_name} {last_name}", investigator_role, None
+    return f"{first_name} {last_name}", investigator_role, None, None
 
 def members_sheet_append(self, grants):
     sheet_df = self.generated_template_manager.df[SHEET_NAME]
@@ -51,7 +45,15 @@ def members_sheet_append(self, grants):
         grant_user_association = None
         grant_user_role = None
         try:
-            grant_user_name, grant_user_role, grant_user_association = determine_pi_info(self, grant_obj)
+            grant_user_name, grant_user_role, grant_user_association, diagnostic = determine_pi_info(self, grant_obj)
+            if diagnostic:
+                # Fuzzy matches are kept but flagged so the investigator can be verified
+                self.generated_template_manager.comment_manager.append_comment(
+                    SHEET_NAME,
+                    next_row,
+                    4,
+                    diagnostic.message
+                )
         except Exception as e:
             self.generated_template_manager.comment_manager.append_comment(
                 SHEET_NAME,
@@ -67,11 +69,9 @@ def members_sheet_append(self, grants):
                 grant_user_role = existing_entry['role']
                 grant_user_association = existing_entry['association 1']
                 
-                if grant_data['Primary_PI'] not in self.INVESTIGATORS_ALT:
-                    self.INVESTIGATORS_ALT[grant_data['Primary_PI']] = {
-                        "username": existing_entry['username'],
-                        "association": existing_entry['association 1']
-                    }
+                if self.INVESTIGATOR_INDEX.add_alias(grant_data['Primary_PI'], existing_entry['username'], existing_entry['association 1']):
+                    # Persist the alias so the next run does not have to fall back to the feedback workbook
+                    self.alias_store.save_alias(grant_data['Primary_PI'], existing_entry['username'], existing_entry['association 1'], "feedback workbook")
                 
         self.generated_template_manager.append_row(SHEET_NAME, {
             "projectLegacyNumber": grant_data['Project_Legacy_Number'],
@@ -1,10 +1,14 @@
-from methods.shared_populating import determine_grant_status
+import pandas as pd
+from methods.shared_populating import compute_statuses
 
 SHEET_NAME = "Project - Template"
 SHEET_COLUMNS = ["projectLegacyNumber", "title", "status"]
 
 
-def projects_sheet_append(self, grants):    
+def projects_sheet_append(self, grants):
+    # Determine the status of every grant in a single pass
+    grant_statuses, grant_status_errors = compute_statuses(pd.DataFrame([grant_obj['grant_data'] for grant_obj in grants]))
+
     for index, grant_obj in enumerate(grants, start=1):
         grant_data = grant_obj['grant_data']
         grant_pln = grant_data['Project_Legacy_Number']
@@ -31,16 +35,14 @@ def projects_sheet_append(self, grants):
                 "Grant was not assigned a Project Title in the database."
             )
             
-        grant_status = None
-        try:
-            grant_status = determine_grant_status(grant_data)
-        except Exception as e:
+        grant_status = grant_statuses.iloc[index - 1]
+        if grant_status_errors.iloc[index - 1]:
             grant_status = existing_grant.get('status')
             self.generated_template_manager.comment_manager.append_comment(
                 SHEET_NAME,
                 index,
                 2,
-                e
+                grant_status_errors.iloc[index - 1]
             )
             
         self.generated_template_manager.append_row(
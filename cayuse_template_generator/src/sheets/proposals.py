@@ -1,6 +1,9 @@
-from datetime import datetime
-from methods.utils import strip_html, find_closest_match, format_string, extract_titles
-from methods.shared_populating import determine_grant_status, determine_grant_discipline, determine_grant_admin_unit, determine_activity_type, determine_sponsor, determine_instrument_type
+import numpy as np
+import pandas as pd
+from classes.TemplateManager.TemplateManager import TemplateManager
+from methods.utils import clean_abstracts
+from methods.shared_populating import ACTIVITY_ASSOCIATIONS, resolve_statuses, resolve_instrument_types, resolve_sponsors, resolve_disciplines, resolve_admin_units, resolve_budget_periods, determine_grant_status, determine_grant_discipline, determine_grant_admin_unit, determine_activity_type, determine_sponsor, determine_instrument_type
+from methods.budget_periods import MAX_BUDGET_PERIODS
 
 SHEET_NAME = "Proposal - Template"
 SHEET_COLUMNS = [
@@ -159,18 +162,32 @@ SHEET_COLUMNS = [
     "Admin Unit Code"
   ]
 
+def budget_columns(grant_budget):
+    columns = {
+        "Number of Budget Periods": grant_budget['periods'],
+        "Total Total Total Direct Cost (TDC) (TDC)s": grant_budget['direct'],
+        "Total InTotal Total Direct Cost (TDC) (TDC)s": grant_budget['indirect'],
+        "Total Sponsor Costs": grant_budget['total']
+    }
+    for year in range(1, MAX_BUDGET_PERIODS + 1):
+        columns[f"Year {year} Total Direct Cost (TDC)s"] = grant_budget[f"direct_{year}"]
+        columns[f"Year {year} InTotal Direct Cost (TDC)s"] = grant_budget[f"indirect_{year}"]
+        columns[f"Year {year} Total Costs"] = grant_budget[f"total_{year}"]
+    return columns
+
 def proposals_sheet_append(self, grants):
+    budgets, budget_diagnostics = resolve_budget_periods(self, [grant_obj['grant_data']['Grant_ID'] for grant_obj in grants], 30)
+    budgets = budgets.to_dict(orient='records')
+    abstracts = clean_abstracts([grant_obj['grant_data']['Abstract'] for grant_obj in grants])
     for index, grant_obj in enumerate(grants, start=1):
         grant_data = grant_obj['grant_data']
-        total_data = grant_obj['total_data']
-        rifunds_data = grant_obj['rifunds_data']
         
         grant_id = grant_data['Grant_ID']
         grant_pln = grant_data['Project_Legacy_Number']
         existing_grant = {}
         if grant_pln:
             template_row = self.feedback_template_manager.get_entry(SHEET_NAME, "projectLegacyNumber", grant_pln)
-            if template_row != None:
+            if template_row is not None:
                 existing_grant = template_row
         else:
             self.generated_template_manager.comment_manager.append_comment(
@@ -203,7 +220,8 @@ def proposals_sheet_append(self, grants):
             )
         if not grant_oar and existing_grant.get('Status'):
             try:
-                grant_oar = determine_grant_status(**grant_data, **{
+                grant_oar = determine_grant_status({
+                    **grant_data,
                     "Status": existing_grant['Status'],
                     "Start_Date_Req": existing_grant['Project Start Date'],
                     "End_Date_Req": existing_grant['Project End Date']
@@ -318,9 +336,16 @@ def proposals_sheet_append(self, grants):
             except Exception as e:
                 print("Error occured while attempting to use existing grant data to determine a Discipline")
         
-        grant_abstract = strip_html(grant_data['Abstract']) if grant_data['Abstract'] else None
+        grant_abstract = abstracts[index - 1]
         
-        grant_num_budget_periods = len(total_data)
+        grant_budget = budgets[index - 1]
+        if budget_diagnostics[index - 1]:
+            self.generated_template_manager.comment_manager.append_comment(
+                SHEET_NAME,
+                index,
+                budget_diagnostics[index - 1].column,
+                budget_diagnostics[index - 1].message
+            )
         grant_rate_cost_type = None
         if grant_data['RIndir%DC']:
             num_direct = float(grant_data['RIndir%DC'])
@@ -333,9 +358,6 @@ def proposals_sheet_append(self, grants):
         
         grant_idc_rate = round((float(grant_data['RIndir%DC']) if grant_rate_cost_type == "Total Direct Costs (TDC)" else (float(grant_data['RIndir%Per']) if grant_rate_cost_type == "Salary and Wages (SW)" else 0)) * 100, 1)
         grant_idc_cost_type_explain = grant_data['Indirect_Deviation']
-        grant_total_direct_cost = round(sum(map(lambda fund: fund['RIAmount'], rifunds_data)))
-        grant_sponsor_cost = round(sum(map(lambda fund: fund['RAmount'], total_data)))
-        print(grant_id, grant_num_budget_periods, grant_rate_cost_type, grant_idc_rate, grant_idc_cost_type_explain, grant_total_direct_cost, grant_sponsor_cost)
         
         grant_has_subrecipient = "Yes" if grant_data['Subrecipient_1'] else "No"
         grant_has_human_subjects = "Yes" if grant_data['Human Subjects'] else "No"
@@ -386,14 +408,11 @@ def proposals_sheet_append(self, grants):
                 "Project End Date": grant_end_date,
                 "Activity Type": grant_activity_type,
                 "Discipline": grant_discipline,
-                "Abstract": "",
-                "Number of Budget Periods": grant_num_budget_periods,
+                "Abstract": grant_abstract,
                 "Indirect Rate Cost Type": grant_rate_cost_type,
                 "IDC Rate": grant_idc_rate,
                 "IDC Cost Type Explanation": grant_idc_cost_type_explain,
-                "Total Total Total Direct Cost (TDC) (TDC)s": round(grant_sponsor_cost - grant_total_direct_cost),
-                "Total InTotal Total Direct Cost (TDC) (TDC)s": grant_total_direct_cost,
-                "Total Sponsor Costs": grant_sponsor_cost,
+                **budget_columns(grant_budget),
                 "IDC Rate Less OnCampus Rate": grant_idc_rate_less_on_campus_rate,
                 "Reassigned Time YN": reassigned_time_yn,
                 "Reassigned Time Details": reassigned_time_details,
@@ -410,4 +429,193 @@ def proposals_sheet_append(self, grants):
                 "Admin Unit Code": grant_admin_unit_code,
                 "John Jay Centers": grant_admin_unit_center
             }
-        )
\ No newline at end of file
+        )
+
+def _first_truthy(*columns):
+    # Column-wise equivalent of 'a or b or c'
+    result = columns[-1]
+    for column in reversed(columns[:-1]):
+        result = column.where(column.map(bool), result)
+    return result
+
+def build_proposals_frame(self, grants):
+    """
+    Builds the rows of the 'Proposal - Template' sheet for every grant using column operations.
+
+    Parameters:
+    - grants: The grants loaded by the entry point, each containing a 'grant_data' dictionary.
+
+    Returns:
+    - A tuple with the DataFrame of new rows and three parallel arrays (rows, columns, messages)
+      holding the coordinates and text of the comments that should be added to the sheet.
+    """
+    frame = pd.DataFrame([grant_obj['grant_data'] for grant_obj in grants], dtype=object)
+    num_grants = len(frame)
+    comment_rows, comment_cols, comment_messages = [], [], []
+
+    def add_comments(mask, col, messages):
+        positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+        comment_rows.append(positions + 1)  # Rows start at 1, same as the per-grant builder
+        comment_cols.append(np.full(len(positions), col))
+        if isinstance(messages, str):
+            comment_messages.append(np.full(len(positions), messages, dtype=object))
+        else:
+            comment_messages.append(np.asarray(messages, dtype=object)[positions])
+
+    def add_diagnostics(diagnostics):
+        # Diagnostics carry the column of their comment, the row is their position in the frame
+        positions = [position for position, diagnostic in enumerate(diagnostics) if diagnostic]
+        comment_rows.append(np.asarray(positions, dtype=int) + 1)
+        comment_cols.append(np.asarray([diagnostics[position].column for position in positions], dtype=int))
+        comment_messages.append(np.asarray([diagnostics[position].message for position in positions], dtype=object))
+
+    def has_diagnostic(diagnostics):
+        return pd.Series([diagnostic is not None for diagnostic in diagnostics], dtype=bool)
+
+    def none_column():
+        return pd.Series([None] * num_grants, dtype=object)
+
+    # Join every grant to the first row of the feedback template that shares its projectLegacyNumber
+    grant_pln = frame['Project_Legacy_Number']
+    grant_ids = frame['Grant_ID'].tolist()
+    has_pln = grant_pln.map(bool)
+    add_comments(~has_pln, 0, "Grant is missing Project_Legacy_Number in the database")
+
+    feedback_df = self.feedback_template_manager.df[SHEET_NAME]
+    feedback_keys = feedback_df['projectLegacyNumber'].map(TemplateManager.normalize_legacy_key)
+    feedback_rows = feedback_df.assign(_legacy_key=feedback_keys).dropna(subset=['_legacy_key']).drop_duplicates('_legacy_key')
+    grant_keys = pd.DataFrame({'_legacy_key': grant_pln.map(TemplateManager.normalize_legacy_key).where(has_pln, None)})
+    existing = grant_keys.merge(feedback_rows, how='left', on='_legacy_key', indicator=True)
+    existing_matched = (existing['_merge'] == 'both').to_numpy()
+
+    def existing_column(col):
+        if col not in existing:
+            return none_column()
+        return existing[col].astype(object).where(existing_matched, None)
+
+    # Status
+    grant_oar, status_diagnostics = resolve_statuses(frame, 2)
+    grant_status = frame['Status'].where(~has_diagnostic(status_diagnostics), None)
+    add_diagnostics(status_diagnostics)
+
+    grant_primary_college = _first_truthy(frame['Prim_College'], existing_column('CUNY Campus'))
+    add_comments(~grant_primary_college.map(bool), 5, "Grant is missing Prim_College in the database.")
+
+    # Instrument types are classified in one pass, matching each distinct 'Award Type' once
+    instrument_types, instrument_diagnostics = resolve_instrument_types(self, frame['Award Type'], frame['Grant_ID'], 7)
+    grant_instrument_type = instrument_types.where(~has_diagnostic(instrument_diagnostics), existing_column('Instrument Type'))
+    add_diagnostics(instrument_diagnostics)
+
+    # Sponsors are resolved once per distinct sponsor name
+    sponsors, sponsor_diagnostics = resolve_sponsors(self, frame['Sponsor_1'].tolist(), grant_ids, 8)
+    grant_sponsor = pd.Series(sponsors, dtype=object).where(~has_diagnostic(sponsor_diagnostics), existing_column('Sponsor'))
+    add_diagnostics(sponsor_diagnostics)
+
+    # Grants without a prime sponsor are not an error
+    has_prime_sponsor = frame['Sponsor_2'].map(bool)
+    prime_sponsors, prime_sponsor_diagnostics = resolve_sponsors(self, frame['Sponsor_2'].tolist(), grant_ids, 9)
+    prime_sponsor_diagnostics = [
+        (diagnostic if has_sponsor else None)
+        for diagnostic, has_sponsor in zip(prime_sponsor_diagnostics, has_prime_sponsor)
+    ]
+    grant_prime_sponsor = pd.Series(prime_sponsors, dtype=object).where(~has_diagnostic(prime_sponsor_diagnostics), existing_column('Prime Sponsor'))
+    add_diagnostics(prime_sponsor_diagnostics)
+
+    grant_title = _first_truthy(frame['Project_Title'], existing_column('Title'))
+    add_comments(~grant_title.map(bool), 17, "Grant is missing Project_Title in database")
+
+    grant_start_date = _first_truthy(frame['Start_Date_Req'], frame['Start_Date'], existing_column('Project Start Date'))
+    add_comments(~grant_start_date.map(bool), 18, "Grant is missing Start_Date in database")
+
+    grant_end_date = _first_truthy(frame['End_Date_Req'], frame['End_Date'], existing_column('Project End Date'))
+    add_comments(~grant_end_date.map(bool), 19, "Grant is missing End_Date in database")
+
+    grant_activity_type = frame['Award_Type'].map(lambda award_type: ACTIVITY_ASSOCIATIONS.get(award_type) if award_type else None)
+
+    # Disciplines are resolved once per distinct value, falling back to the discipline in the feedback template
+    disciplines, discipline_diagnostics = resolve_disciplines(self, _first_truthy(frame['Discipline'], frame['Primary_Dept']).tolist(), grant_ids, 23)
+    grant_discipline = pd.Series(disciplines, dtype=object)
+    add_diagnostics(discipline_diagnostics)
+    existing_discipline = existing_column('Discipline')
+    use_existing_discipline = ~grant_discipline.map(bool) & existing_discipline.map(bool)
+    fallback_disciplines, _ = resolve_disciplines(self, existing_discipline.where(use_existing_discipline, None).tolist())
+    grant_discipline = grant_discipline.where(~use_existing_discipline, pd.Series(fallback_disciplines, dtype=object))
+
+    # Budget
+    budget, budget_diagnostics = resolve_budget_periods(self, grant_ids, 30)
+    add_diagnostics(budget_diagnostics)
+    direct_rate = pd.to_numeric(frame['RIndir%DC'], errors='coerce').fillna(0)
+    wages_rate = pd.to_numeric(frame['RIndir%Per'], errors='coerce').fillna(0)
+    grant_rate_cost_type = pd.Series(np.select(
+        [wages_rate != 0, direct_rate != 0],
+        ["Salary and Wages (SW)", "Total Direct Costs (TDC)"],
+        default=None
+    ), dtype=object)
+    grant_idc_rate = pd.Series(np.select(
+        [wages_rate != 0, direct_rate != 0],
+        [wages_rate, direct_rate],
+        default=0
+    )).map(lambda rate: round(rate * 100, 1))
+
+    def yes_no(col, no="No"):
+        return pd.Series(np.where(frame[col].map(bool), "Yes", no), dtype=object)
+
+    grant_has_irb_approval = frame['IRB_Approval'].map(bool)
+
+    grant_submit_date = frame['Date_Submitted']
+    add_comments(~grant_submit_date.map(bool), 149, "Grant is missing Date_Submitted in the database")
+
+    # Admin units are resolved once per distinct department
+    admin_units, admin_unit_diagnostics = resolve_admin_units(self, frame['Primary_Dept'].tolist(), grant_ids, 151)
+    add_diagnostics(admin_unit_diagnostics)
+
+    proposals_frame = pd.DataFrame({
+        "projectLegacyNumber": grant_pln,
+        "proposalLegacyNumber": frame['Grant_ID'],
+        "status": grant_status,
+        "OAR Status": grant_oar,
+        "CUNY Campus": grant_primary_college,
+        "Instrument Type": grant_instrument_type,
+        "Sponsor": grant_sponsor,
+        "Prime Sponsor": grant_prime_sponsor,
+        "Title": grant_title,
+        "Project Start Date": grant_start_date,
+        "Project End Date": grant_end_date,
+        "Activity Type": grant_activity_type,
+        "Discipline": grant_discipline,
+        "Abstract": clean_abstracts(frame['Abstract'].tolist()),
+        "Indirect Rate Cost Type": grant_rate_cost_type,
+        "IDC Rate": grant_idc_rate,
+        "IDC Cost Type Explanation": frame['Indirect_Deviation'],
+        **budget_columns(budget),
+        "IDC Rate Less OnCampus Rate": "No",
+        "Reassigned Time YN": "No",
+        "Reassigned Time Details": None,
+        "Subrecipient": yes_no('Subrecipient_1'),
+        "Human Subjects": yes_no('Human Subjects'),
+        "IRB Protocol Status": pd.Series(np.where(grant_has_irb_approval, "Approved", None), dtype=object),
+        "IRB Approval Date": frame['IRB_Start'].where(grant_has_irb_approval, None),
+        "Animal Subjects": yes_no('Research Animals'),
+        "Hazardous Materials": yes_no('Biohazards', "None"),
+        "Export Control": yes_no('Export Control'),
+        "Additional Comments": frame['Comments'],
+        "Submission Date": grant_submit_date,
+        "Admin Unit Name": [admin_unit[0] for admin_unit in admin_units],
+        "Admin Unit Code": [admin_unit[1] for admin_unit in admin_units],
+        "John Jay Centers": [admin_unit[2] for admin_unit in admin_units]
+    }, index=range(num_grants))
+
+    if comment_rows:
+        comment_rows = np.concatenate(comment_rows)
+        comment_cols = np.concatenate(comment_cols)
+        comment_messages = np.concatenate(comment_messages)
+    return proposals_frame, comment_rows, comment_cols, comment_messages
+
+def proposals_sheet_build(self, grants):
+    if not grants:
+        return
+    proposals_frame, comment_rows, comment_cols, comment_messages = build_proposals_frame(self, grants)
+
+    sheet_df = self.generated_template_manager.df[SHEET_NAME]
+    self.generated_template_manager.df[SHEET_NAME] = pd.concat([sheet_df, proposals_frame], ignore_index=True)
+    self.generated_template_manager.comment_manager.append_comments(SHEET_NAME, comment_rows, comment_cols, comment_messages)